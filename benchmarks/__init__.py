@@ -0,0 +1 @@
+"""SFM-2 Package: benchmarks"""
@@ -0,0 +1,80 @@
+"""
+Benchmark Fixtures
+Deterministic, offline inputs for the benchmark suite: a synthetic Sona corpus, a small BPE
+tokenizer trained on it, and tiny randomly initialised GPT-2 models that run quickly on CPU.
+"""
+import os
+import random
+
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+SEED = 1234
+SPECIAL_TOKENS = ["<pad>", "<s>", "</s>", "<unk>"]  # ids 0-3, matching configs/example_config.json
+
+# Tiny stand-ins for sfm2 (target) and gpt2_lora (draft)
+TARGET_CONFIG = {"n_positions": 512, "n_embd": 64, "n_layer": 2, "n_head": 4}
+DRAFT_CONFIG = {"n_positions": 512, "n_embd": 32, "n_layer": 1, "n_head": 2}
+
+_NAMES = ["add", "scale", "merge", "parse", "walk", "fold", "total", "render"]
+_VARS = ["a", "b", "n", "acc", "item", "xs", "count", "value"]
+
+
+def sona_sample(rng):
+    """Build one syntactically valid Sona function."""
+    name = rng.choice(_NAMES) + str(rng.randint(0, 99))
+    args = rng.sample(_VARS, 2)
+    body = [f"    let {rng.choice(_VARS)} = {args[0]} + {rng.randint(0, 9)};" for _ in range(rng.randint(1, 6))]
+    if rng.random() < 0.5:
+        body.append(f"    if ({args[1]} > 0) {{ return [{args[0]}, {args[1]}]; }}")
+    return f"fn {name}({args[0]}, {args[1]}) {{\n" + "\n".join(body) + f"\n    return {args[0]};\n}}\n"
+
+
+def sona_corpus(n=200, invalid_ratio=0.2, seed=SEED):
+    """Synthetic corpus with a fraction of broken samples to exercise the cleaners."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        sample = sona_sample(rng)
+        if rng.random() < invalid_ratio:
+            # Drop the closing brace or the required keywords
+            sample = sample[:-2] if rng.random() < 0.5 else sample.replace("let", "var")
+        corpus.append(sample)
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """Write ``corpus`` as ``*.sona`` files into ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    for i, sample in enumerate(corpus):
+        with open(os.path.join(directory, f"sample_{i:04d}.sona"), "w", encoding="utf-8") as f:
+            f.write(sample)
+    return directory
+
+
+def tiny_tokenizer(corpus, vocab_size=512, save_path=None):
+    """Train a byte-level BPE tokenizer on ``corpus``; optionally save its JSON to ``save_path``."""
+    tok = Tokenizer(models.BPE(unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=vocab_size,
+        special_tokens=SPECIAL_TOKENS,
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+        show_progress=False,
+    )
+    tok.train_from_iterator(corpus, trainer)
+    if save_path:
+        tok.save(save_path)
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tok, pad_token="<pad>", bos_token="<s>", eos_token="</s>", unk_token="<unk>"
+    )
+
+
+def tiny_gpt2(vocab_size, seed=SEED, **overrides):
+    """Randomly initialised GPT-2 in eval mode; defaults to the tiny target config."""
+    torch.manual_seed(seed)
+    params = dict(TARGET_CONFIG, **overrides)
+    config = GPT2Config(vocab_size=vocab_size, bos_token_id=1, eos_token_id=2, pad_token_id=0, **params)
+    return GPT2LMHeadModel(config).eval()
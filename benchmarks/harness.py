@@ -0,0 +1,168 @@
+"""
+Benchmark Harness
+Timing helpers, an in-process ASGI load generator, and baseline comparison.
+- Timings are wall-clock per call, reported in seconds (lower is better)
+- The load generator drives the FastAPI app directly over ASGI, no sockets or server
+"""
+import asyncio
+import json
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def summarize(samples):
+    """Summary statistics for a list of per-call timings."""
+    return {
+        "value": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "min": min(samples),
+        "p95": _percentile(samples, 95),
+        "samples": len(samples),
+        "unit": "s",
+    }
+
+
+def measure(fn, number=1, repeat=7, warmup=1):
+    """Time ``fn``; each sample is the mean over ``number`` calls."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples)
+
+
+async def asgi_request(app, method, path, body=None, headers=None):
+    """Issue one HTTP request against an ASGI app. Returns (status, headers, body bytes)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    raw_headers = [(b"host", b"benchmark"), (b"content-length", str(len(payload)).encode())]
+    if body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    response = {"status": None, "headers": [], "body": []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    headers_out = {k.decode(): v.decode() for k, v in response["headers"]}
+    return response["status"], headers_out, b"".join(response["body"])
+
+
+@asynccontextmanager
+async def asgi_lifespan(app):
+    """Run the app's lifespan startup/shutdown around the block."""
+    to_app, from_app = asyncio.Queue(), asyncio.Queue()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}}
+    task = asyncio.ensure_future(app(scope, to_app.get, from_app.put))
+    await to_app.put({"type": "lifespan.startup"})
+    message = await from_app.get()
+    if message["type"] == "lifespan.startup.failed":
+        raise RuntimeError(f"Lifespan startup failed: {message.get('message')}")
+    try:
+        yield app
+    finally:
+        await to_app.put({"type": "lifespan.shutdown"})
+        await from_app.get()
+        await task
+
+
+async def wait_until(predicate, timeout=60.0, interval=0.01):
+    """Poll ``predicate()`` until it is true; raise TimeoutError after ``timeout`` seconds."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"Condition not met within {timeout:g}s")
+        await asyncio.sleep(interval)
+
+
+async def run_load(app, make_request, total=200, concurrency=8, ready=None):
+    """Closed-loop load: ``concurrency`` workers issue ``total`` requests built by ``make_request(i)``.
+
+    ``ready`` is an optional predicate awaited after lifespan startup, so background warm-up
+    work started by the lifespan is not timed.
+    """
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, body, headers = make_request(i)
+            start = time.perf_counter()
+            status, _, _ = await asgi_request(app, method, path, body, headers)
+            latencies.append(time.perf_counter() - start)
+            if status is None or status >= 500:
+                errors += 1
+
+    async with asgi_lifespan(app):
+        if ready is not None:
+            await wait_until(ready)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+    result = summarize(latencies)
+    result.update(
+        {
+            "p50": _percentile(latencies, 50),
+            "p99": _percentile(latencies, 99),
+            "throughput_rps": total / wall,
+            "concurrency": concurrency,
+            "errors": errors,
+        }
+    )
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, baseline, current, ratio) for benchmarks slower than ``1 + threshold``."""
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base or not base.get("value"):
+            continue
+        ratio = current["value"] / base["value"]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, base["value"], current["value"], ratio))
+    return regressions
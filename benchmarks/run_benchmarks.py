@@ -0,0 +1,293 @@
+"""
+SFM-2 Benchmark Suite
+Reproducible, offline CPU benchmarks for the serving and training hot paths.
+- Serving: /health and /inference through an in-process ASGI load generator
+- Core: intelligent_routing, speculative decoding with tiny GPT-2 models
+- Training: tokenization, data_processing cleaners, get_dataset, evaluation metrics
+- Writes results to JSON and fails if any benchmark regresses past the baseline threshold
+
+Usage:
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --save-baseline      # refresh benchmarks/baseline.json
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from glob import glob
+from contextlib import contextmanager
+
+import torch
+import transformers
+
+from benchmarks import fixtures
+from benchmarks.harness import compare, measure, run_load
+from sfm2.training.data_processing import clean_dataset, is_valid_sample
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+RESULTS_PATH = os.path.abspath("bench_results.json")
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function taking the shared :class:`BenchContext`."""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+@contextmanager
+def _chdir(path):
+    cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+class BenchContext:
+    """Fixtures shared across benchmarks, built once per run."""
+
+    def __init__(self, workdir, quick=False):
+        self.workdir = workdir
+        self.quick = quick
+        self.repeat = 3 if quick else 7
+        self.corpus = fixtures.sona_corpus(n=50 if quick else 200)
+        self.raw_dir = fixtures.write_corpus(self.corpus, os.path.join(workdir, "raw"))
+        self.clean_dir = os.path.join(workdir, "cleaned")
+        clean_dataset(self.raw_dir, self.clean_dir, verbose=False)
+        self.tokenizer_path = os.path.join(workdir, "tokenizer.json")
+        self.tokenizer = fixtures.tiny_tokenizer(self.corpus, save_path=self.tokenizer_path)
+        vocab = len(self.tokenizer)
+        self.target = fixtures.tiny_gpt2(vocab)
+        self.draft = fixtures.tiny_gpt2(vocab, seed=fixtures.SEED + 1, **fixtures.DRAFT_CONFIG)
+
+
+@benchmark("core.intelligent_routing")
+def bench_routing(ctx):
+    from sfm2.core.model_manager import ModelManager
+
+    mm = ModelManager(gpt2_lora=object(), sfm2=object(), openai_available=True)
+    cases = [("sona", "auto"), ("natural", "simple"), ("repl", "complex")] * 1000
+
+    def run():
+        for prompt_type, complexity in cases:
+            mm.intelligent_routing(prompt_type, complexity)
+
+    return measure(run, repeat=ctx.repeat)
+
+
+@benchmark("core.speculative_generate")
+def bench_speculative(ctx):
+    from sfm2.core.speculative import SpeculativeDecoder
+
+    decoder = SpeculativeDecoder(target=ctx.target, draft=ctx.draft, k=4)
+    input_ids = ctx.tokenizer(ctx.corpus[0], return_tensors="pt")["input_ids"]
+    result = measure(lambda: decoder.generate(input_ids, max_new_tokens=32), repeat=ctx.repeat)
+    _, stats = decoder.generate(input_ids, max_new_tokens=32)
+    result["acceptance_rate"] = stats["acceptance_rate"]
+    return result
+
+
+@benchmark("core.greedy_generate")
+def bench_greedy(ctx):
+    input_ids = ctx.tokenizer(ctx.corpus[0], return_tensors="pt")["input_ids"]
+
+    def run():
+        with torch.no_grad():
+            ctx.target.generate(input_ids, max_new_tokens=32, min_new_tokens=32, do_sample=False, pad_token_id=0)
+
+    return measure(run, repeat=ctx.repeat)
+
+
+@benchmark("tokenization.encode_batch")
+def bench_encode(ctx):
+    return measure(lambda: ctx.tokenizer(ctx.corpus)["input_ids"], repeat=ctx.repeat)
+
+
+@benchmark("tokenization.decode_batch")
+def bench_decode(ctx):
+    encoded = ctx.tokenizer(ctx.corpus)["input_ids"]
+    return measure(lambda: ctx.tokenizer.batch_decode(encoded), repeat=ctx.repeat)
+
+
+@benchmark("training.is_valid_sample")
+def bench_is_valid_sample(ctx):
+    return measure(lambda: [is_valid_sample(code) for code in ctx.corpus], repeat=ctx.repeat)
+
+
+@benchmark("training.clean_dataset")
+def bench_clean_dataset(ctx):
+    return measure(lambda: clean_dataset(ctx.raw_dir, ctx.clean_dir, verbose=False), repeat=ctx.repeat)
+
+
+@benchmark("training.get_dataset")
+def bench_get_dataset(ctx):
+    from sfm2.training.pipeline import get_dataset
+
+    def run():
+        # TextDataset caches its blocks next to train.txt; drop the cache so every sample tokenizes
+        for path in glob(os.path.join(ctx.workdir, "cached_lm_*")):
+            os.remove(path)
+        return get_dataset(ctx.tokenizer, ctx.clean_dir)
+
+    with _chdir(ctx.workdir):  # get_dataset writes train.txt to the working directory
+        return measure(run, repeat=ctx.repeat)
+
+
+@benchmark("evaluation.score_sample")
+def bench_score_sample(ctx):
+    from sfm2.training.evaluation import score_sample
+
+    pairs = list(zip(ctx.corpus, ctx.corpus[1:]))
+    return measure(lambda: [score_sample(ref, gen) for ref, gen in pairs], repeat=ctx.repeat)
+
+
+@benchmark("evaluation.evaluate")
+def bench_evaluate(ctx):
+    from sfm2.training.evaluation import evaluate
+
+    model_dir = os.path.join(ctx.workdir, "model")
+    data_dir = os.path.join(ctx.workdir, "eval_data")
+    ctx.target.save_pretrained(model_dir)
+    fixtures.write_corpus(ctx.corpus[:8], os.path.join(ctx.workdir, "eval_raw"))
+    clean_dataset(os.path.join(ctx.workdir, "eval_raw"), data_dir, verbose=False)
+    results_path = os.path.join(ctx.workdir, "eval_results.json")
+    return measure(
+        lambda: evaluate(model_dir, ctx.tokenizer_path, data_dir, results_path), repeat=max(1, ctx.repeat // 2)
+    )
+
+
+def _load_app():
+    os.environ.pop("OPENAI_API_KEY", None)  # keep the fallback route offline
+    # Measure the serving path, not the single-client rate limiter
+    os.environ.setdefault("SFM2_TENANT_RATE", "1e9")
+    os.environ.setdefault("SFM2_TENANT_BURST", "1e9")
+    import sfm2.api.app as api
+
+    return api
+
+
+def _load_bench(ctx, make_request):
+    api = _load_app()
+    total = 100 if ctx.quick else 400
+
+    def ready():
+        # Each lifespan entry marks serving and starts warm_up() (openai import, model loads);
+        # wait for that warm-up to finish before timing
+        startup = api.startup
+        return startup.ready_at is not None and startup.ready_at >= startup.serving_at
+
+    return asyncio.run(run_load(api.app, make_request, total=total, concurrency=8, ready=ready))
+
+
+@benchmark("api.import_time")
+def bench_api_import(ctx):
+    # Fresh interpreter each sample so module caches don't hide cold-start regressions
+    cmd = [sys.executable, "-c", "import sfm2.api.app"]
+    return measure(lambda: subprocess.run(cmd, check=True), repeat=ctx.repeat, warmup=1)
+
+
+@benchmark("api.health")
+def bench_api_health(ctx):
+    return _load_bench(ctx, lambda i: ("GET", "/health", None, None))
+
+
+@benchmark("api.inference_no_model")
+def bench_api_inference(ctx):
+    body = {"prompt": "fn add(a, b) {", "prompt_type": "sona", "complexity": "simple"}
+    return _load_bench(ctx, lambda i: ("POST", "/inference", body, None))
+
+
+@benchmark("api.inference_speculative")
+def bench_api_speculative(ctx):
+    from sfm2.core.model_manager import ModelManager
+
+    api = _load_app()
+    original = api.model_manager
+    api.model_manager = ModelManager(
+        gpt2_lora=ctx.draft, sfm2=ctx.target, openai_available=False, tokenizer=ctx.tokenizer
+    )
+    body = {"prompt": ctx.corpus[0][:40], "prompt_type": "sona", "speculative": True, "max_new_tokens": 16}
+    try:
+        return _load_bench(ctx, lambda i: ("POST", "/inference", body, None))
+    finally:
+        api.model_manager = original
+
+
+def run(names, quick=False):
+    """Run the selected benchmarks and return the results document."""
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "threads": torch.get_num_threads(),
+            "quick": quick,
+        },
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="sfm2-bench-") as workdir:
+        ctx = BenchContext(workdir, quick=quick)
+        for name in names:
+            print(f"⏱️  {name} ...", end=" ", flush=True)
+            results["benchmarks"][name] = BENCHMARKS[name](ctx)
+            print(f"{results['benchmarks'][name]['value'] * 1e3:.3f} ms")
+    return results
+
+
+def main(argv=None):
+    """Run the benchmark suite and compare against the stored baseline."""
+    parser = argparse.ArgumentParser(description="Run the SFM-2 benchmark suite")
+    parser.add_argument("--output", default=RESULTS_PATH, help="File to write benchmark results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown relative to baseline before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="Fail instead of skipping the comparison when no baseline exists (use in CI)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads (pinned for stability)")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats")
+    args = parser.parse_args(argv)
+
+    torch.set_num_threads(args.threads)
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run(names, quick=args.quick)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Benchmark results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if args.require_baseline else 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, current, ratio in regressions:
+        print(f"❌ {name}: {base * 1e3:.3f} ms -> {current * 1e3:.3f} ms ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print(f"✅ No regressions beyond {args.threshold:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
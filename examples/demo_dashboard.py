@@ -7,11 +7,22 @@ For production deployment, additional private components are required.
 """
 Phase 6: Demo Dashboard for Model Comparison
 Streamlit dashboard to compare Sona AI model outputs, fallback logs, and latency stats.
+- Inference: single requests, latency reported by the server (Server-Timing)
+- Server Analytics: live latency histograms and routing/fallback breakdowns from GET /metrics
+- Load Test: drives open-loop load at configurable rates and plots throughput vs. latency
 """
 import streamlit as st
+import pandas as pd
 import requests
+import threading
+import itertools
+import math
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sfm2.utils.metrics import percentile_from_buckets
 
 st.set_page_config(page_title="SonaCore AI Pipeline", layout="wide")
 st.title("🚀 SonaCore AI Pipeline Demo")
@@ -20,6 +31,251 @@ st.markdown("> **Live Demo**: Testing SFM-2 model training, API endpoints, and i
 # Sidebar for configuration
 st.sidebar.header("⚙️ Configuration")
 api_base = st.sidebar.text_input("API Base URL", value="http://localhost:8000")
+mode = st.sidebar.radio("Mode", ["🧠 Inference", "📈 Server Analytics", "🔥 Load Test"])
+
+
+def server_timing_total(headers):
+    """Total server-side milliseconds from a Server-Timing header, if present."""
+    for part in headers.get("Server-Timing", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name == "total" and params.startswith("dur="):
+            return float(params[4:])
+    return None
+
+
+def parse_buckets(buckets):
+    return [[math.inf if bound == "inf" else bound, count] for bound, count in buckets]
+
+
+def merged_buckets(latency):
+    """Sum per-model histograms from a /metrics snapshot into one bucket list."""
+    merged = {}
+    for hist in latency.values():
+        for bound, count in parse_buckets(hist["buckets"]):
+            merged[bound] = merged.get(bound, 0) + count
+    return [[bound, merged[bound]] for bound in sorted(merged)]
+
+
+def fetch_metrics(since=None):
+    params = {"since": since} if since is not None else None
+    resp = requests.get(f"{api_base}/metrics", params=params, timeout=5)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def render_server_analytics():
+    st.header("📈 Server Analytics")
+    st.caption("Latency is measured inside the API process, not in this dashboard.")
+    col1, col2 = st.columns(2)
+    live = col1.checkbox("🔴 Live", value=True)
+    refresh_s = col2.slider("Refresh interval (s)", 1, 30, 5)
+
+    # Accumulate the timeline across reruns; reset when the API changes
+    state = st.session_state
+    if state.get("metrics_api") != api_base:
+        state.metrics_api, state.timeline, state.metrics_since = api_base, [], None
+    try:
+        snapshot = fetch_metrics(state.metrics_since)
+    except Exception as e:
+        st.error(f"❌ Cannot fetch metrics from {api_base}/metrics: {e}")
+        return
+    state.timeline = (state.timeline + snapshot["timeline"])[-720:]
+    if state.timeline:
+        state.metrics_since = state.timeline[-1]["t"]
+
+    latency = snapshot["latency"]
+    outcomes = snapshot["outcomes"]
+    total = sum(outcomes.values())
+    buckets = merged_buckets(latency)  # served ("ok") requests only
+    fallback = outcomes.get("openai.ok", 0)
+    shed = sum(c for key, c in outcomes.items() if key.rsplit(".", 1)[-1] in ("rate_limited", "queue_full", "shed"))
+
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Requests", f"{total}")
+    p50, p95 = percentile_from_buckets(buckets, 0.5), percentile_from_buckets(buckets, 0.95)
+    k2.metric("p50 latency", f"{p50:.1f} ms" if p50 is not None else "–")
+    k3.metric("p95 latency", f"{p95:.1f} ms" if p95 is not None else "–")
+    k4.metric("OpenAI fallback share", f"{fallback / total:.1%}" if total else "–")
+    k5.metric("Shed (429)", f"{shed}")
+
+    if state.timeline:
+        timeline = pd.DataFrame(state.timeline)
+        timeline.index = [datetime.fromtimestamp(t) for t in timeline["t"]]
+        st.subheader("⏱️ Latency over time (ms)")
+        st.line_chart(timeline[["p50_ms", "p95_ms", "p99_ms"]])
+        st.subheader("🔀 Requests per window by model")
+        st.area_chart(pd.DataFrame(list(timeline["by_model"]), index=timeline.index).fillna(0))
+        st.subheader("🚦 Outcomes per window")
+        st.bar_chart(pd.DataFrame(list(timeline["by_outcome"]), index=timeline.index).fillna(0))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("📊 Latency histogram by model")
+        if latency:
+            histogram = pd.DataFrame({
+                model: {f"≤{b:g} ms" if b != "inf" else "> max": c for b, c in hist["buckets"]}
+                for model, hist in latency.items()
+            })
+            st.bar_chart(histogram)
+            st.dataframe(pd.DataFrame(latency).T[["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]])
+        else:
+            st.info("No inference requests recorded yet.")
+    with col2:
+        st.subheader("🧭 Routing & fallback breakdown")
+        if outcomes:
+            breakdown = pd.DataFrame(
+                [key.rsplit(".", 1) + [count] for key, count in outcomes.items()],
+                columns=["model", "outcome", "count"],
+            ).pivot_table(index="model", columns="outcome", values="count", fill_value=0)
+            st.bar_chart(breakdown)
+        st.subheader("🛂 Admission control")
+        st.json(snapshot.get("admission", {}))
+
+    if live:
+        time.sleep(refresh_s)
+        st.rerun()
+
+
+def run_load_step(url, payload, api_key, rate, duration, concurrency, key_per_worker=False):
+    """Open-loop load at ``rate`` req/s for ``duration`` s.
+
+    Latency is measured from each request's scheduled send time, so queueing in this client
+    under saturation is counted rather than hidden. With ``key_per_worker`` each worker thread
+    sends its own X-API-Key, spreading load over several per-tenant rate limits.
+    """
+    local = threading.local()
+    worker_ids = itertools.count()
+
+    def send(scheduled):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.headers = {"X-API-Key": f"{api_key}-{next(worker_ids)}" if key_per_worker else api_key}
+        try:
+            status = local.session.post(url, json=payload, headers=local.headers, timeout=60).status_code
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - scheduled, status
+
+    n = max(1, int(rate * duration))
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        futures = []
+        for i in range(n):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, scheduled))
+        results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def percentile_ms(sorted_seconds, q):
+    if not sorted_seconds:
+        return None
+    return sorted_seconds[min(len(sorted_seconds) - 1, int(q * len(sorted_seconds)))] * 1e3
+
+
+def summarize_step(rate, results, elapsed, server_before, server_after):
+    ok = sorted(lat for lat, status in results if status == 200)
+    row = {
+        "offered_rps": rate,
+        "throughput_rps": len(ok) / elapsed,
+        "p50_ms": percentile_ms(ok, 0.50),
+        "p95_ms": percentile_ms(ok, 0.95),
+        "p99_ms": percentile_ms(ok, 0.99),
+        "shed_429": sum(1 for _, status in results if status == 429),
+        "errors": sum(1 for _, status in results if status is None or status >= 500),
+    }
+    if server_before and server_after:
+        before = dict(map(tuple, merged_buckets(server_before["latency"])))
+        delta = [[b, c - before.get(b, 0)] for b, c in merged_buckets(server_after["latency"])]
+        row["server_p50_ms"] = percentile_from_buckets(delta, 0.50)
+        row["server_p95_ms"] = percentile_from_buckets(delta, 0.95)
+    return row
+
+
+def render_load_test():
+    st.header("🔥 Load Test")
+    st.caption("Drives /inference at each offered rate and records client and server latency. Use it to size deployments.")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rates_text = st.text_input("Offered rates (req/s, comma separated)", value="1, 2, 5, 10, 20")
+        duration = st.number_input("Seconds per rate", min_value=1, max_value=300, value=10)
+    with col2:
+        concurrency = st.number_input("Max concurrent requests", min_value=1, max_value=256, value=32)
+        api_key = st.text_input("API key (rate-limit tenant)", value="dashboard-load-test")
+        key_per_worker = st.checkbox(
+            "One key per worker", value=False,
+            help="Spread load over several tenants so the per-tenant rate limit does not cap throughput",
+        )
+    with col3:
+        prompt_type = st.selectbox("Prompt Type", ["natural", "sona", "repl"], key="load_prompt_type")
+        priority = st.selectbox("Priority", ["interactive", "batch"])
+    prompt = st.text_area("Prompt", value="Create a Sona function to add two numbers", height=80)
+
+    if not st.button("▶️ Run Load Test", type="primary"):
+        if st.session_state.get("load_results"):
+            show_load_results(st.session_state.load_results)
+        return
+
+    try:
+        rates = [float(r) for r in rates_text.split(",") if r.strip()]
+    except ValueError:
+        st.error("Rates must be numbers, e.g. `1, 5, 10`")
+        return
+    if not rates or any(rate <= 0 for rate in rates):
+        st.error("Rates must be greater than 0")
+        return
+    url = f"{api_base}/inference"
+    payload = {"prompt": prompt, "prompt_type": prompt_type, "priority": priority}
+
+    rows = []
+    progress = st.progress(0.0)
+    for i, rate in enumerate(rates):
+        progress.progress(i / len(rates), text=f"Offering {rate:g} req/s ...")
+        try:
+            before = fetch_metrics()
+        except Exception:
+            before = None
+        results, elapsed = run_load_step(
+            url, payload, api_key, rate, duration, int(concurrency), key_per_worker=key_per_worker
+        )
+        try:
+            after = fetch_metrics()
+        except Exception:
+            after = None
+        rows.append(summarize_step(rate, results, elapsed, before, after))
+    progress.progress(1.0, text="Done")
+    st.session_state.load_results = rows
+    show_load_results(rows)
+
+
+def show_load_results(rows):
+    df = pd.DataFrame(rows)
+    shed = int(df["shed_429"].sum())
+    if shed:
+        st.warning(
+            f"⚠️ {shed} requests were rejected with 429. Throughput is capped by admission control "
+            "(per-tenant rate limit or model queue), not by server capacity. For sizing runs raise "
+            "SFM2_TENANT_RATE / SFM2_TENANT_BURST on the API or enable one key per worker."
+        )
+    st.subheader("📋 Results")
+    st.dataframe(df)
+    st.subheader("📈 Throughput vs. latency")
+    latency_cols = [c for c in ("p50_ms", "p95_ms", "p99_ms", "server_p50_ms", "server_p95_ms") if c in df]
+    st.line_chart(df.set_index("throughput_rps")[latency_cols])
+    st.subheader("🎯 Offered vs. achieved throughput")
+    st.line_chart(df.set_index("offered_rps")[["throughput_rps"]])
+
+
+if mode == "📈 Server Analytics":
+    render_server_analytics()
+    st.stop()
+elif mode == "🔥 Load Test":
+    render_load_test()
+    st.stop()
 
 # Health Check Section
 st.header("📊 Model Health Status")
@@ -71,7 +327,7 @@ with col3:
 
 if st.button("🚀 Run Inference", type="primary") and prompt.strip():
     st.info("🔄 Running inference...")
-    t0 = time.time()
+    t0 = time.perf_counter()
     
     try:
         resp = requests.post(
@@ -81,9 +337,11 @@ if st.button("🚀 Run Inference", type="primary") and prompt.strip():
                 "prompt_type": prompt_type, 
                 "complexity": complexity
             },
+            headers={"X-SFM2-Trace": "1"},
             timeout=30
         )
-        latency = time.time() - t0
+        latency = time.perf_counter() - t0
+        server_ms = server_timing_total(resp.headers)
         
         if resp.status_code == 200:
             data = resp.json()
@@ -118,7 +376,10 @@ if st.button("🚀 Run Inference", type="primary") and prompt.strip():
                 else:
                     st.code(result)
                 
-                st.metric("⏱️ Latency", f"{latency:.2f}s")
+                col1, col2 = st.columns(2)
+                if server_ms is not None:
+                    col1.metric("⏱️ Server Latency", f"{server_ms / 1e3:.3f}s")
+                col2.metric("🌐 Round Trip", f"{latency:.2f}s")
                 
         else:
             st.error(f"❌ API Error: HTTP {resp.status_code}")
@@ -37,11 +37,14 @@ setup(
     install_requires=requirements,
     extras_require={
         "dev": ["pytest>=7.0.0", "black>=22.0.0", "flake8>=5.0.0", "mypy>=0.971"],
+        "export": ["onnx>=1.14.0", "onnxruntime>=1.16.0"],
     },
     entry_points={
         "console_scripts": [
             "sfm2-train=sfm2.training.pipeline:main",
             "sfm2-evaluate=sfm2.training.evaluation:main",
+            "sfm2-distill=sfm2.training.distillation:main",
+            "sfm2-export=sfm2.training.export:main",
         ],
     },
 )
@@ -8,14 +8,94 @@ For production deployment, additional private components are required.
 Phase 5: API Endpoint for ModelManager and Inference
 Exposes a simple FastAPI endpoint for Sona AI inference with fallback and health check.
 """
-from fastapi import FastAPI, Request
-from pydantic import BaseModel
-from api.model_manager import ModelManager
+import time
+_import_started = time.perf_counter()
+
+from contextlib import AsyncExitStack, asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from sfm2.core.admission import AdmissionController, PriorityGate, QueueFullError
+from sfm2.core.backends import BACKENDS
+from sfm2.core.model_manager import ModelManager
+from sfm2.utils.metrics import ServerMetrics
+from sfm2.utils.profiling import RECENT_TRACES, SamplingProfiler, TraceMiddleware, record_span, trace_span
+from sfm2.utils.startup import StartupReport
+import asyncio
 import logging
+import math
 import os
+import secrets
 
-app = FastAPI()
 logger = logging.getLogger("SonaAPI")
+startup = StartupReport(origin=_import_started, target_s=float(os.getenv('SFM2_STARTUP_TARGET_S', '2.0')))
+
+
+def load_backends():
+    """Heavy imports and model loads, run in a worker thread after the API starts serving.
+
+    Models are loaded from SFM2_MODEL_PATH (sfm2) and SFM2_GPT2_LORA_PATH (merged GPT-2 LoRA
+    checkpoint) with the backend chosen in SFM2_BACKENDS. Each model's tokenizer is read from its
+    own directory. For exported backends the paths point at the ``sfm2-export`` output directory.
+    """
+    try:
+        with startup.phase("import_openai"):
+            import openai  # noqa: F401  (warms the import used by openai_generate)
+    except ImportError:
+        pass
+
+    model_paths = {
+        'sfm2': os.getenv('SFM2_MODEL_PATH'),
+        'gpt2_lora': os.getenv('SFM2_GPT2_LORA_PATH'),
+    }
+    if not any(model_paths.values()):
+        startup.skip("import_torch", "no model paths configured")
+        return
+
+    with startup.phase("import_torch"):
+        from transformers import AutoTokenizer
+
+    for name, path in model_paths.items():
+        if not path:
+            startup.skip(f"load_{name}", "path not configured")
+            continue
+        try:
+            with startup.phase(f"load_{name}"):
+                # SFM-2 and GPT-2 LoRA have different vocabularies; never share a tokenizer
+                tokenizer = AutoTokenizer.from_pretrained(path)
+                model_manager.load(name, path, tokenizer=tokenizer)
+        except Exception as e:
+            logger.error(f"Failed to load {name} from {path}: {e}")
+
+
+async def warm_up():
+    try:
+        await run_in_threadpool(load_backends)
+    finally:
+        startup.mark_ready()
+        startup.log()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.mark_serving()
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(TraceMiddleware)
+
+MAX_PROFILE_SECONDS = 60.0
+profiler = SamplingProfiler()
+metrics = ServerMetrics(window_s=float(os.getenv('SFM2_METRICS_WINDOW_S', '5')))
 
 
 def openai_generate(prompt: str, prompt_type: str) -> str:
@@ -57,40 +137,176 @@ def openai_generate(prompt: str, prompt_type: str) -> str:
         return f"OpenAI generation failed: {str(e)}"
 
 
-# Model instances - will be replaced with real models in production
-gpt2_lora = None  # TODO: Load actual GPT-2 LoRA model
-sfm2 = None       # TODO: Load actual SFM-2 model
+# Model instances - attached by load_backends() once the background warm-up finishes
+gpt2_lora = None
+sfm2 = None
 openai_available = True  # Enable OpenAI fallback
 
+
+def parse_backends(spec: str):
+    """Parse SFM2_BACKENDS, e.g. ``sfm2=onnx,gpt2_lora=eager``; unknown names fail at startup."""
+    pairs = (item.split('=', 1) for item in spec.split(',') if '=' in item)
+    backends = {name.strip(): kind.strip() for name, kind in pairs}
+    for name, kind in backends.items():
+        if name not in ('sfm2', 'gpt2_lora'):
+            raise ValueError(f"SFM2_BACKENDS: unknown model '{name}'. Expected sfm2 or gpt2_lora")
+        if kind not in BACKENDS:
+            raise ValueError(
+                f"SFM2_BACKENDS: unknown backend '{kind}' for {name}. Available: {', '.join(sorted(BACKENDS))}"
+            )
+    return backends
+
+
 model_manager = ModelManager(
     gpt2_lora=gpt2_lora, 
     sfm2=sfm2, 
-    openai_available=openai_available
+    openai_available=openai_available,
+    backends=parse_backends(os.getenv('SFM2_BACKENDS', ''))
+)
+
+admission = AdmissionController(
+    tenant_rate=float(os.getenv('SFM2_TENANT_RATE', '5')),
+    tenant_burst=float(os.getenv('SFM2_TENANT_BURST', '20')),
+    fallback_per_minute=float(os.getenv('SFM2_FALLBACK_PER_MINUTE', '60')),
 )
+# One gate per local model: bounds concurrent forward passes, interactive requests served first.
+# Dict order is the acquisition order for calls that need several gates.
+model_queues = {
+    name: PriorityGate(
+        concurrency=int(os.getenv('SFM2_MODEL_CONCURRENCY', '1')),
+        max_waiting={
+            'interactive': int(os.getenv('SFM2_MAX_QUEUE_INTERACTIVE', '64')),
+            'batch': int(os.getenv('SFM2_MAX_QUEUE_BATCH', '256')),
+        },
+    )
+    for name in ('gpt2_lora', 'sfm2')
+}
+
+
+MAX_NEW_TOKENS = int(os.getenv('SFM2_MAX_NEW_TOKENS', '512'))
 
 
 class InferenceRequest(BaseModel):
     prompt: str
     prompt_type: str = "natural"
     complexity: str = "auto"
+    speculative: bool = False  # Draft with gpt2_lora, verify with sfm2 (greedy only)
+    max_new_tokens: int = Field(64, ge=1, le=MAX_NEW_TOKENS)
+    priority: Literal["interactive", "batch"] = "interactive"
 
 
-@app.post("/inference")
-async def inference(req: InferenceRequest):
-    route = model_manager.intelligent_routing(
-        req.prompt_type, 
-        req.complexity
+async def run_blocking(span: str, fn, *args):
+    """Run a blocking model call in the threadpool, tracing queue wait and execution time."""
+    submitted = time.perf_counter()
+
+    def call():
+        record_span("queue", time.perf_counter() - submitted)
+        with trace_span(span):
+            return fn(*args)
+
+    return await run_in_threadpool(call)
+
+
+async def run_model(routes, priority: str, fn, *args):
+    """Run a local model call once the priority gate of every model in ``routes`` grants a slot.
+
+    Gates are always acquired in ``model_queues`` order (gpt2_lora, then sfm2), so calls that
+    hold several gates cannot deadlock against each other.
+    """
+    waiting = time.perf_counter()
+    async with AsyncExitStack() as slots:
+        for name in model_queues:
+            if name in routes:
+                await slots.enter_async_context(model_queues[name].slot(priority))
+        record_span("gate", time.perf_counter() - waiting)
+        return await run_blocking("forward", fn, *args)
+
+
+def shed(error_code: str, message: str, retry_after: float) -> JSONResponse:
+    """429 with a structured fallback body and a Retry-After header."""
+    body = model_manager.structured_fallback_response(
+        error_code=error_code,
+        message=message,
+        fallback_used="none",
+        # A zero rate never refills, so there is no finite time to suggest
+        retry_after=retry_after if math.isfinite(retry_after) else None,
     )
-    
+    headers = {"Retry-After": str(max(1, math.ceil(retry_after)))} if math.isfinite(retry_after) else {}
+    return JSONResponse(status_code=429, content=body, headers=headers)
+
+
+# X-Tenant-ID is self-declared; honour it only behind a proxy that sets it after authentication
+TRUST_TENANT_HEADER = os.getenv('SFM2_TRUST_TENANT_HEADER', '').lower() in ('1', 'true', 'yes')
+
+
+def tenant_of(request: Request) -> str:
+    """Rate-limit key: X-API-Key, else X-Tenant-ID (trusted proxies only), else the client address."""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return f"key:{api_key}"
+    tenant = request.headers.get("x-tenant-id") if TRUST_TENANT_HEADER else None
+    if tenant:
+        return f"tenant:{tenant}"
+    return f"ip:{request.client.host}" if request.client else "anonymous"
+
+
+@app.post("/inference")
+async def inference(req: InferenceRequest, request: Request):
+    start = time.perf_counter()
+    route, outcome = "none", "error"
+    try:
+        wait = admission.admit(tenant_of(request), req.priority)
+        if wait:
+            outcome = "rate_limited"
+            return shed("RATE_LIMITED", "Request rate limit exceeded for this API key.", wait)
+
+        with trace_span("routing"):
+            route = model_manager.intelligent_routing(
+                req.prompt_type, 
+                req.complexity
+            )
+        try:
+            response = await dispatch(route, req)
+        except QueueFullError as e:
+            admission.count(f"rejected.queue_full.{e.priority}")
+            outcome = "queue_full"
+            return shed("QUEUE_FULL", f"{route} is at capacity for {e.priority} requests.", e.retry_after)
+        if isinstance(response, JSONResponse):
+            outcome = "shed"
+        elif response.get("success") is False:
+            outcome = "no_model"
+        else:
+            outcome = "ok"
+        return response
+    finally:
+        metrics.observe(route, outcome, time.perf_counter() - start)
+
+
+def local_generate(route: str, prompt: str, max_new_tokens: int) -> str:
+    """Generate with a local model (sfm2 or gpt2_lora) through its configured backend."""
+    if model_manager.models[route]['instance'] is None or model_manager.models[route]['tokenizer'] is None:
+        return {'sfm2': "[SFM-2 not loaded yet]", 'gpt2_lora': "[GPT-2 LoRA not loaded yet]"}[route]
+    return model_manager.generate(route, prompt, max_new_tokens)
+
+
+async def dispatch(route: str, req: InferenceRequest):
+    """Call the routed model; local models wait on their priority gate."""
     # Call the actual model's generate method based on routing
-    if route == 'sfm2':
-        # TODO: result = sfm2.generate(req.prompt, req.prompt_type)
-        return {"model": "sfm2", "result": "[SFM-2 not loaded yet]"}
-    elif route == 'gpt2_lora':
-        # TODO: result = gpt2_lora.generate(req.prompt, req.prompt_type)
-        return {"model": "gpt2_lora", "result": "[GPT-2 LoRA not loaded yet]"}
+    if route in model_queues:
+        if route == 'sfm2' and req.speculative and model_manager.speculative_available():
+            # Each round runs a gpt2_lora draft pass as well, so hold both models' slots
+            result, stats = await run_model(
+                ('gpt2_lora', 'sfm2'), req.priority,
+                model_manager.speculative_generate, req.prompt, req.max_new_tokens,
+            )
+            return {"model": "sfm2", "result": result, "speculative": stats}
+        result = await run_model((route,), req.priority, local_generate, route, req.prompt, req.max_new_tokens)
+        return {"model": route, "result": result}
     elif route == 'openai':
-        result = openai_generate(req.prompt, req.prompt_type)
+        wait = admission.admit_fallback()
+        if wait:
+            return shed("FALLBACK_BUDGET_EXHAUSTED", "OpenAI fallback budget exhausted.", wait)
+        result = await run_blocking("fallback", openai_generate, req.prompt, req.prompt_type)
         return {"model": "openai", "result": result}
     else:
         return model_manager.structured_fallback_response(
@@ -103,6 +319,65 @@ async def inference(req: InferenceRequest):
 @app.get("/health")
 async def health():
     model_manager.health_check()
-    return model_manager.models
+    return model_manager.status()
+
+
+@app.get("/admission")
+async def admission_stats():
+    """Admitted/rejected counters and current model queue depths."""
+    stats = admission.snapshot()
+    stats["queues"] = {name: gate.snapshot() for name, gate in model_queues.items()}
+    return stats
+
+
+@app.get("/metrics")
+async def server_metrics(since: Optional[float] = None):
+    """Server-side latency histograms, routing/outcome breakdown and a rolling timeline.
+
+    Pass ``since`` (the previous snapshot's ``now``) to receive only new timeline windows.
+    """
+    snapshot = metrics.snapshot(since=since)
+    snapshot["admission"] = admission.snapshot()
+    return snapshot
+
+
+@app.get("/startup")
+async def startup_report():
+    """Startup phase timings; ``ready`` turns true once background model loading finishes."""
+    return startup.to_dict()
+
+
+def require_admin(token: Optional[str]):
+    """Admin endpoints are disabled unless SFM2_ADMIN_TOKEN is set, and then require it."""
+    expected = os.getenv('SFM2_ADMIN_TOKEN')
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not token or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/profile", response_class=PlainTextResponse)
+async def profile(seconds: float = 10.0, interval_ms: float = 5.0, x_admin_token: Optional[str] = Header(None)):
+    """Sample all threads for ``seconds`` and return folded stacks for flamegraph tools."""
+    require_admin(x_admin_token)
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profiling session is already running")
+    profiler.interval = max(interval_ms, 1.0) / 1e3
+    profiler.start()
+    try:
+        await asyncio.sleep(min(max(seconds, 0.1), MAX_PROFILE_SECONDS))
+    finally:
+        profiler.stop()
+    logger.info(f"Profiling session captured {profiler.sample_count} samples")
+    return PlainTextResponse(profiler.collapsed())
+
+
+@app.get("/admin/traces")
+async def traces(x_admin_token: Optional[str] = Header(None)):
+    """Most recent request traces captured via the X-SFM2-Trace header."""
+    require_admin(x_admin_token)
+    return list(RECENT_TRACES)
+
+startup.record("import_app", _import_started, time.perf_counter())
 
-# To run: uvicorn api.app:app --reload
+# To run: uvicorn sfm2.api.app:app --reload
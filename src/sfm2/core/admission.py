@@ -0,0 +1,164 @@
+"""
+Request Admission Control
+Keeps batch traffic from starving interactive users and protects the OpenAI fallback quota.
+- TokenBucket: per-tenant request rate limiting, plus a global budget for fallback calls
+- PriorityGate: bounded concurrency in front of each local model, interactive served before batch
+- Shed requests carry a retry-after hint; every decision is counted
+"""
+import time
+import heapq
+import asyncio
+import itertools
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+PRIORITIES = {'interactive': 0, 'batch': 1}
+
+
+class QueueFullError(Exception):
+    def __init__(self, priority: str, retry_after: float):
+        super().__init__(f"Model queue full for {priority} requests")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock=time.monotonic):
+        if rate < 0 or burst < 0:
+            raise ValueError(f"Token bucket rate and burst must be >= 0, got rate={rate}, burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated = clock()
+
+    def available(self) -> float:
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def take(self, tokens: float = 1.0) -> float:
+        """Consume ``tokens``. Returns 0.0 when admitted, otherwise seconds until they would be available.
+
+        A bucket with ``rate`` 0 never refills: once its burst is spent this returns ``inf``.
+        """
+        if self.available() >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (tokens - self.tokens) / self.rate
+
+
+class PriorityGate:
+    def __init__(self, concurrency: int = 1, max_waiting: Optional[Dict[str, int]] = None):
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting or {'interactive': 64, 'batch': 256}
+        self.active = 0
+        self.waiting = Counter()
+        self.service_time = 0.5  # EWMA of seconds per call, used for retry-after hints
+        self._heap = []
+        self._seq = itertools.count()
+
+    def retry_after(self) -> float:
+        queued = sum(self.waiting.values())
+        return self.service_time * (queued / self.concurrency + 1)
+
+    async def acquire(self, priority: str):
+        if self.active < self.concurrency and not self._heap:
+            self.active += 1
+            return
+        if self.waiting[priority] >= self.max_waiting.get(priority, 0):
+            raise QueueFullError(priority, self.retry_after())
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (PRIORITIES[priority], next(self._seq), future))
+        self.waiting[priority] += 1
+        try:
+            await future  # release() hands its slot over directly
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # slot was handed over just before cancellation
+            raise
+        finally:
+            self.waiting[priority] -= 1
+
+    def release(self):
+        while self._heap:
+            _, _, future = heapq.heappop(self._heap)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        await self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_time = 0.8 * self.service_time + 0.2 * (time.perf_counter() - start)
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'active': self.active, 'concurrency': self.concurrency, 'waiting': dict(self.waiting)}
+
+
+class AdmissionController:
+    def __init__(self, tenant_rate: float = 5.0, tenant_burst: float = 20.0, fallback_per_minute: float = 60.0,
+                 fallback_burst: Optional[float] = None, max_tenants: int = 10000, clock=time.monotonic):
+        self.tenant_rate = tenant_rate
+        self.tenant_burst = tenant_burst
+        self.max_tenants = max_tenants
+        self.clock = clock
+        self.fallback_budget = TokenBucket(
+            fallback_per_minute / 60.0,
+            fallback_burst if fallback_burst is not None else self._default_burst(fallback_per_minute),
+            clock=clock,
+        )
+        self.counters = Counter()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @staticmethod
+    def _default_burst(per_minute: float) -> float:
+        # A zero budget disables the fallback outright rather than allowing one call
+        return max(1.0, per_minute / 6.0) if per_minute > 0 else 0.0
+
+    def _bucket(self, tenant: str) -> TokenBucket:
+        bucket = self._buckets.get(tenant)
+        if bucket is None:
+            bucket = self._buckets[tenant] = TokenBucket(self.tenant_rate, self.tenant_burst, clock=self.clock)
+            if len(self._buckets) > self.max_tenants:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(tenant)
+        return bucket
+
+    def admit(self, tenant: str, priority: str) -> float:
+        """Rate-limit a request. Returns 0.0 when admitted, else a retry-after in seconds."""
+        wait = self._bucket(tenant).take()
+        self.counters[f"admitted.{priority}" if wait == 0.0 else f"rejected.rate_limited.{priority}"] += 1
+        return wait
+
+    def admit_fallback(self) -> float:
+        """Draw from the global OpenAI fallback budget. Returns 0.0 or a retry-after in seconds."""
+        wait = self.fallback_budget.take()
+        self.counters["fallback.admitted" if wait == 0.0 else "fallback.rejected"] += 1
+        return wait
+
+    def count(self, key: str):
+        self.counters[key] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'counters': dict(self.counters),
+            'tenants_tracked': len(self._buckets),
+            'fallback_tokens': round(self.fallback_budget.available(), 3),
+            'config': {
+                'tenant_rate': self.tenant_rate,
+                'tenant_burst': self.tenant_burst,
+                'fallback_per_minute': self.fallback_budget.rate * 60.0,
+            },
+        }
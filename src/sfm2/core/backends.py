@@ -0,0 +1,161 @@
+"""
+Pluggable Inference Backends
+Runs a GPT-2 style SFM-2 checkpoint either eagerly or from a graph exported by ``sfm2-export``.
+Every backend is called like ``GPT2LMHeadModel``: ``backend(input_ids=..., past_key_values=...)``
+returns an object with ``.logits`` (torch tensor) and ``.past_key_values`` (a per-layer tuple of
+(key, value) tensors/arrays, sliceable on the sequence axis), so it can be used by
+SpeculativeDecoder and ModelManager interchangeably.
+- eager: transformers GPT2LMHeadModel from a checkpoint directory
+- torchscript: model.ts traced with explicit position ids and flat KV-cache inputs
+- onnx: model.onnx run with onnxruntime, same flat KV-cache interface
+"""
+import os
+import json
+from abc import ABC, abstractmethod
+from typing import Any, NamedTuple
+
+EXPORT_CONFIG = "export_config.json"
+GRAPH_FILES = {"torchscript": "model.ts", "onnx": "model.onnx"}
+
+
+class BackendOutput(NamedTuple):
+    logits: Any
+    past_key_values: Any
+
+
+def _read_export_config(export_dir: str, kind: str):
+    with open(os.path.join(export_dir, EXPORT_CONFIG), "r", encoding="utf-8") as f:
+        export_config = json.load(f)
+    if export_config["format"] != kind:
+        raise ValueError(f"{export_dir} contains a {export_config['format']} export, not {kind}")
+    return export_config
+
+
+class _ExportedBackend(ABC):
+    """Shared flat KV-cache bookkeeping for exported graphs."""
+
+    def __init__(self, export_dir: str, kind: str):
+        from transformers import GPT2Config
+
+        self.export_config = _read_export_config(export_dir, kind)
+        self.config = GPT2Config.from_pretrained(export_dir)
+        self.n_layer = self.export_config["n_layer"]
+        self.past_shape = (self.export_config["n_head"], 0, self.export_config["head_dim"])
+
+    @abstractmethod
+    def _empty_past(self, batch: int):
+        """Zero-length per-layer (key, value) cache in the graph's native array type."""
+
+    @abstractmethod
+    def _run(self, input_ids, position_ids, flat_past):
+        """Run the graph; returns (logits tensor, flat present key/values)."""
+
+    def __call__(self, input_ids, past_key_values=None, use_cache=True, **kwargs):
+        import torch
+
+        batch, seq = input_ids.shape
+        if past_key_values is None:
+            past_key_values = self._empty_past(batch)
+        past_len = past_key_values[0][0].shape[-2]
+        position_ids = torch.arange(past_len, past_len + seq, dtype=torch.long).unsqueeze(0).expand(batch, -1)
+        flat_past = [t for layer in past_key_values for t in layer]
+        logits, present = self._run(input_ids, position_ids, flat_past)
+        present = tuple((present[2 * i], present[2 * i + 1]) for i in range(self.n_layer))
+        return BackendOutput(logits, present)
+
+
+class TorchScriptBackend(_ExportedBackend):
+    def __init__(self, export_dir: str):
+        import torch
+
+        super().__init__(export_dir, "torchscript")
+        self.module = torch.jit.load(os.path.join(export_dir, GRAPH_FILES["torchscript"]), map_location="cpu")
+        self.module.eval()
+
+    def _empty_past(self, batch: int):
+        import torch
+
+        empty = torch.zeros((batch,) + self.past_shape)
+        return tuple((empty, empty) for _ in range(self.n_layer))
+
+    def _run(self, input_ids, position_ids, flat_past):
+        import torch
+
+        with torch.no_grad():
+            outputs = self.module(input_ids, position_ids, *flat_past)
+        return outputs[0], outputs[1:]
+
+
+class OnnxBackend(_ExportedBackend):
+    def __init__(self, export_dir: str, intra_op_threads: int = 0):
+        import onnxruntime as ort
+
+        super().__init__(export_dir, "onnx")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads or int(os.getenv("SFM2_ORT_THREADS", "0"))
+        self.session = ort.InferenceSession(
+            os.path.join(export_dir, GRAPH_FILES["onnx"]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _empty_past(self, batch: int):
+        import numpy as np
+
+        empty = np.zeros((batch,) + self.past_shape, dtype=np.float32)
+        return tuple((empty, empty) for _ in range(self.n_layer))
+
+    def _run(self, input_ids, position_ids, flat_past):
+        import numpy as np
+        import torch
+
+        # The KV cache stays in numpy between steps; only logits are handed back as torch
+        feeds = [input_ids.numpy(), position_ids.numpy()] + [
+            t.numpy() if isinstance(t, torch.Tensor) else np.ascontiguousarray(t) for t in flat_past
+        ]
+        outputs = self.session.run(None, dict(zip(self.input_names, feeds)))
+        return torch.from_numpy(outputs[0]), outputs[1:]
+
+
+def _load_eager(model_dir: str):
+    from transformers import GPT2LMHeadModel
+
+    model = GPT2LMHeadModel.from_pretrained(model_dir)
+    model.config.use_cache = True
+    return model.eval()
+
+
+BACKENDS = {
+    "eager": _load_eager,
+    "torchscript": TorchScriptBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(kind: str, model_dir: str):
+    """Load ``model_dir`` with the named backend (``eager``, ``torchscript`` or ``onnx``)."""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend '{kind}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[kind](model_dir)
+
+
+def greedy_generate(model, input_ids, max_new_tokens: int = 64, eos_token_id=None):
+    """Greedy decoding with KV cache for any backend (or a GPT2LMHeadModel), batch size 1.
+
+    ``max_new_tokens`` is clamped to the context left in ``model.config.n_positions``.
+    """
+    import torch
+
+    n_positions = getattr(getattr(model, "config", None), "n_positions", None)
+    if n_positions is not None:
+        max_new_tokens = max(0, min(max_new_tokens, n_positions - input_ids.shape[1]))
+    ids, past, step_input = input_ids, None, input_ids
+    with torch.no_grad():
+        for _ in range(max_new_tokens):
+            out = model(input_ids=step_input, past_key_values=past, use_cache=True)
+            past = out.past_key_values
+            step_input = out.logits[:, -1:].argmax(dim=-1)
+            ids = torch.cat([ids, step_input], dim=1)
+            if eos_token_id is not None and step_input.item() == eos_token_id:
+                break
+    return ids
@@ -10,19 +10,47 @@ Provides health checks, intelligent routing, and structured fallback responses f
 """
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 logger = logging.getLogger("ModelManager")
 
 class ModelManager:
-    def __init__(self, gpt2_lora=None, sfm2=None, openai_available=False):
+    def __init__(self, gpt2_lora=None, sfm2=None, openai_available=False, tokenizer=None, speculative_k=4,
+                 backends: Optional[Dict[str, str]] = None):
+        self.backends = backends or {}  # Per-model runtime: 'eager' (default), 'torchscript' or 'onnx'
+        self.speculative_k = speculative_k
+        self._speculative = None
+        # ``tokenizer`` applies to both models passed here; models attached later bring their own
         self.models = {
-            'gpt2_lora': {'loaded': gpt2_lora is not None, 'healthy': False, 'instance': gpt2_lora},
-            'sfm2': {'loaded': sfm2 is not None, 'healthy': False, 'instance': sfm2},
+            'gpt2_lora': {'loaded': gpt2_lora is not None, 'healthy': False, 'instance': gpt2_lora,
+                          'tokenizer': tokenizer},
+            'sfm2': {'loaded': sfm2 is not None, 'healthy': False, 'instance': sfm2, 'tokenizer': tokenizer},
             'openai': {'available': openai_available, 'quota_ok': False}
         }
         self.health_check()
 
+    def attach(self, name: str, instance, tokenizer=None):
+        """Register a model loaded after startup (e.g. by the API's background warm-up)."""
+        self.models[name].update({'loaded': instance is not None, 'instance': instance, 'tokenizer': tokenizer})
+        self._speculative = None
+        self.health_check()
+
+    def load(self, name: str, path: str, tokenizer=None):
+        """Load a model from ``path`` with its configured backend and attach it."""
+        # Imported lazily so the API can start without pulling in torch
+        from sfm2.core.backends import load_backend
+        kind = self.backends.get(name, 'eager')
+        instance = load_backend(kind, path)
+        self.models[name]['backend'] = kind
+        self.attach(name, instance, tokenizer=tokenizer)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Model status without the loaded instances and tokenizers, for logs and the /health endpoint."""
+        return {
+            name: {key: value for key, value in model.items() if key not in ('instance', 'tokenizer')}
+            for name, model in self.models.items()
+        }
+
     def health_check(self):
         # TODO: Implement real health checks for each model
         for name, model in self.models.items():
@@ -32,7 +60,7 @@ class ModelManager:
             elif name == 'openai':
                 # Placeholder: check quota or API key
                 model['quota_ok'] = bool(os.getenv('OPENAI_API_KEY'))
-        logger.info(f"Model health: {self.models}")
+        logger.info(f"Model health: {self.status()}")
 
     def intelligent_routing(self, prompt_type: str, complexity: str = 'auto') -> str:
         """Route based on prompt type, complexity, and model health."""
@@ -44,14 +72,75 @@ class ModelManager:
             return 'openai'
         return 'none'
 
-    def structured_fallback_response(self, error_code: str, message: str, fallback_used: str) -> Dict[str, Any]:
-        return {
+    def generate(self, name: str, prompt: str, max_new_tokens: int = 64) -> str:
+        """Greedy generation with a loaded local model, its own tokenizer and its configured backend."""
+        instance, tokenizer = self.models[name]['instance'], self.models[name]['tokenizer']
+        if instance is None or tokenizer is None:
+            raise RuntimeError(f"{name} is not loaded")
+        # Imported lazily so the API can start without pulling in torch
+        from sfm2.core.backends import greedy_generate
+        input_ids = tokenizer(prompt, return_tensors="pt")["input_ids"]
+        output_ids = greedy_generate(
+            instance, input_ids, max_new_tokens=max_new_tokens, eos_token_id=tokenizer.eos_token_id
+        )
+        return tokenizer.decode(output_ids[0, input_ids.shape[1]:], skip_special_tokens=True)
+
+    def speculative_available(self) -> bool:
+        """Whether sfm2 can be served with gpt2_lora as its speculative draft model."""
+        return (
+            self.models['sfm2']['healthy']
+            and self.models['gpt2_lora']['healthy']
+            and self._speculative_decoder() is not None
+        )
+
+    def _speculative_decoder(self):
+        if self._speculative is None:
+            # Imported lazily so the API can start without pulling in torch
+            from sfm2.core.speculative import SpeculativeDecoder
+            target_tok, draft_tok = self.models['sfm2']['tokenizer'], self.models['gpt2_lora']['tokenizer']
+            try:
+                if target_tok is None:
+                    raise ValueError("sfm2 has no tokenizer")
+                # Drafts are decoded with the sfm2 tokenizer, so both models must use the same vocabulary
+                shared = draft_tok is None or draft_tok is target_tok or draft_tok.get_vocab() == target_tok.get_vocab()
+                if not shared:
+                    raise ValueError("gpt2_lora and sfm2 tokenizers differ; speculative decoding requires a shared one")
+                self._speculative = SpeculativeDecoder(
+                    target=self.models['sfm2']['instance'],
+                    draft=self.models['gpt2_lora']['instance'],
+                    k=self.speculative_k,
+                )
+            except ValueError as e:
+                logger.warning(f"Speculative decoding disabled: {e}")
+                self._speculative = False
+        return self._speculative or None
+
+    def speculative_generate(self, prompt: str, max_new_tokens: int = 64) -> Tuple[str, Dict[str, Any]]:
+        """Generate with sfm2, drafting tokens with gpt2_lora. Returns (text, stats)."""
+        decoder = self._speculative_decoder()
+        if decoder is None:
+            raise RuntimeError("Speculative decoding is not available")
+        # Only reached once the vocabulary checks in _speculative_decoder() have passed
+        tokenizer = self.models['sfm2']['tokenizer']
+        input_ids = tokenizer(prompt, return_tensors="pt")["input_ids"]
+        output_ids, stats = decoder.generate(
+            input_ids, max_new_tokens=max_new_tokens, eos_token_id=tokenizer.eos_token_id
+        )
+        text = tokenizer.decode(output_ids[0, input_ids.shape[1]:], skip_special_tokens=True)
+        return text, stats
+
+    def structured_fallback_response(self, error_code: str, message: str, fallback_used: str,
+                                     retry_after: Optional[float] = None) -> Dict[str, Any]:
+        response = {
             "success": False,
             "error_code": error_code,
             "message": message,
             "fallback_used": fallback_used,
             "retry_suggested": True
         }
+        if retry_after is not None:
+            response["retry_after"] = round(retry_after, 3)
+        return response
 
 # Example usage (to be integrated with API or main engine)
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+"""
+Speculative Decoding for the SFM-2 Route
+A small draft model proposes k tokens which the larger target model verifies in a single
+forward pass. Under greedy decoding the output is identical to decoding with the target alone.
+- Draft and target must share a tokenizer (same vocabulary)
+- k adapts per round: grows while drafts are fully accepted, shrinks on rejections
+- Per-request statistics (acceptance rate, forward passes) are returned with the output
+"""
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+from sfm2.utils.profiling import trace_span
+
+logger = logging.getLogger("SpeculativeDecoder")
+
+
+def _crop_past(past, length: int):
+    """Truncate a KV cache to the first ``length`` positions."""
+    if past is None:
+        return None
+    if hasattr(past, "crop"):
+        # transformers Cache objects (DynamicCache) crop in place
+        past.crop(length)
+        return past
+    return tuple(tuple(t[..., :length, :] for t in layer) for layer in past)
+
+
+class SpeculativeDecoder:
+    def __init__(self, target, draft, k: int = 4, adaptive: bool = True, min_k: int = 1, max_k: int = 8):
+        target_vocab = getattr(getattr(target, "config", None), "vocab_size", None)
+        draft_vocab = getattr(getattr(draft, "config", None), "vocab_size", None)
+        if target_vocab is not None and draft_vocab is not None and target_vocab != draft_vocab:
+            raise ValueError(
+                f"Draft vocab size ({draft_vocab}) does not match target vocab size ({target_vocab}); "
+                "speculative decoding requires a shared tokenizer."
+            )
+        if not 1 <= min_k <= k <= max_k:
+            raise ValueError(f"Expected 1 <= min_k <= k <= max_k, got min_k={min_k}, k={k}, max_k={max_k}")
+        self.target = target
+        self.draft = draft
+        self.k = k
+        self.adaptive = adaptive
+        self.min_k = min_k
+        self.max_k = max_k
+
+    def _max_new_tokens(self, prompt_len: int, requested: int) -> int:
+        """Cap generation so neither model runs past its position embeddings."""
+        limits = [
+            getattr(getattr(model, "config", None), "n_positions", None) for model in (self.target, self.draft)
+        ]
+        limits = [limit - prompt_len for limit in limits if limit is not None]
+        return max(0, min([requested] + limits))
+
+    @staticmethod
+    def _forward(model, input_ids, past):
+        out = model(input_ids=input_ids, past_key_values=past, use_cache=True)
+        return out.logits, out.past_key_values
+
+    def _next_k(self, k: int, accepted: int) -> int:
+        if not self.adaptive:
+            return k
+        if accepted == k:
+            return min(k + 1, self.max_k)
+        return max(self.min_k, k - 1)
+
+    @torch.no_grad()
+    def generate(
+        self, input_ids: torch.Tensor, max_new_tokens: int = 64, eos_token_id: Optional[int] = None
+    ) -> Tuple[torch.Tensor, Dict[str, Any]]:
+        """Greedy speculative generation for a single sequence (batch size 1).
+
+        Returns the full sequence (prompt + generated tokens) and a stats dict. ``max_new_tokens``
+        is clamped to the context left in the smaller of the two models' ``n_positions``.
+        """
+        if input_ids.dim() != 2 or input_ids.shape[0] != 1:
+            raise ValueError("SpeculativeDecoder.generate only supports batch size 1")
+
+        prompt_len = input_ids.shape[1]
+        max_new_tokens = self._max_new_tokens(prompt_len, max_new_tokens)
+        ids = input_ids
+        target_past, draft_past = None, None
+        target_seen, draft_seen = 0, 0  # positions already held in each KV cache
+        k = self.k
+        stats = {"drafted": 0, "accepted": 0, "rounds": 0, "target_forward_passes": 0, "draft_forward_passes": 0}
+
+        while ids.shape[1] - prompt_len < max_new_tokens:
+            k_round = min(k, max_new_tokens - (ids.shape[1] - prompt_len))
+
+            # Draft k tokens autoregressively with the small model
+            draft_tokens = []
+            step_input = ids[:, draft_seen:]
+            for _ in range(k_round):
+                with trace_span("draft_forward"):
+                    logits, draft_past = self._forward(self.draft, step_input, draft_past)
+                stats["draft_forward_passes"] += 1
+                draft_seen += step_input.shape[1]
+                step_input = logits[:, -1:].argmax(dim=-1)
+                draft_tokens.append(step_input)
+            drafted = torch.cat(draft_tokens, dim=1)
+
+            # Verify every drafted position with one target forward pass
+            verify_input = torch.cat([ids[:, target_seen:], drafted], dim=1)
+            with trace_span("verify_forward"):
+                logits, target_past = self._forward(self.target, verify_input, target_past)
+            stats["target_forward_passes"] += 1
+            predicted = logits[:, -(k_round + 1):].argmax(dim=-1)
+
+            matches = (predicted[:, :k_round] == drafted)[0].tolist()
+            n_accepted = matches.index(False) if False in matches else k_round
+            new_tokens = torch.cat([drafted[:, :n_accepted], predicted[:, n_accepted:n_accepted + 1]], dim=1)
+
+            context_len = ids.shape[1]
+            ids = torch.cat([ids, new_tokens], dim=1)
+            # Keep only cache entries for tokens the target agreed with
+            target_seen = context_len + n_accepted
+            target_past = _crop_past(target_past, target_seen)
+            draft_seen = min(draft_seen, target_seen)
+            draft_past = _crop_past(draft_past, draft_seen)
+
+            stats["rounds"] += 1
+            stats["drafted"] += k_round
+            stats["accepted"] += n_accepted
+            k = self._next_k(k_round, n_accepted)
+
+            if eos_token_id is not None and eos_token_id in new_tokens[0].tolist():
+                eos_pos = context_len + new_tokens[0].tolist().index(eos_token_id)
+                ids = ids[:, :eos_pos + 1]
+                break
+
+        ids = ids[:, :prompt_len + max_new_tokens]
+        stats["new_tokens"] = ids.shape[1] - prompt_len
+        stats["acceptance_rate"] = stats["accepted"] / max(1, stats["drafted"])
+        stats["final_k"] = k
+        logger.debug(f"Speculative decoding stats: {stats}")
+        return ids, stats
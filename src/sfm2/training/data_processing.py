@@ -8,37 +8,51 @@ from glob import glob
 
 RAW_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'raw'))
 CLEAN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), 'cleaned'))
-os.makedirs(CLEAN_DIR, exist_ok=True)
 
 # Simple Sona syntax checks
 REQUIRED_KEYWORDS = [r'\bfn\b', r'\blet\b']
 BRACE_PATTERN = re.compile(r'[{}\[\]()]')
 
-for file in glob(os.path.join(RAW_DIR, '*.sona')):
-    with open(file, 'r', encoding='utf-8', errors='ignore') as f:
-        code = f.read()
+
+def is_valid_sample(code):
+    """Return True if ``code`` passes the length, keyword and brace-matching checks."""
     # Remove empty or tiny files
     if len(code.strip()) < 20:
-        continue
+        return False
     # Check for required keywords
     if not all(re.search(kw, code) for kw in REQUIRED_KEYWORDS):
-        continue
+        return False
     # Check for matching braces
     stack = []
     braces = {'{': '}', '(': ')', '[': ']'}
-    valid = True
     for c in code:
         if c in braces:
             stack.append(braces[c])
         elif c in braces.values():
             if not stack or stack.pop() != c:
-                valid = False
-                break
-    if not valid or stack:
-        continue
-    # Save cleaned file
-    out_path = os.path.join(CLEAN_DIR, os.path.basename(file))
-    with open(out_path, 'w', encoding='utf-8') as out:
-        out.write(code)
-    print(f"✅ Cleaned: {os.path.basename(file)}")
-print("🎉 Dataset cleaning complete. Cleaned files in datasets/cleaned/")
+                return False
+    return not stack
+
+
+def clean_dataset(raw_dir=RAW_DIR, clean_dir=CLEAN_DIR, verbose=True):
+    """Copy every valid ``*.sona`` file from ``raw_dir`` to ``clean_dir``. Returns the number kept."""
+    os.makedirs(clean_dir, exist_ok=True)
+    kept = 0
+    for file in glob(os.path.join(raw_dir, '*.sona')):
+        with open(file, 'r', encoding='utf-8', errors='ignore') as f:
+            code = f.read()
+        if not is_valid_sample(code):
+            continue
+        # Save cleaned file
+        out_path = os.path.join(clean_dir, os.path.basename(file))
+        with open(out_path, 'w', encoding='utf-8') as out:
+            out.write(code)
+        kept += 1
+        if verbose:
+            print(f"✅ Cleaned: {os.path.basename(file)}")
+    return kept
+
+
+if __name__ == "__main__":
+    clean_dataset()
+    print("🎉 Dataset cleaning complete. Cleaned files in datasets/cleaned/")
@@ -0,0 +1,310 @@
+"""
+Phase 4b: SFM-2 Knowledge Distillation
+Distils the trained SFM-2 model into a smaller, faster GPT-2 student for the complexity="simple" route.
+- Loads the teacher and tokenizer from models/sfm-2/
+- Trains on datasets/cleaned/*.sona using the same blocks as sfm2-train, minus a held-out split
+- Caches teacher top-k logits once to memory-mapped .npy files, reused every epoch
+- Saves the student to models/sfm-2-student/
+- Writes a side-by-side teacher/student quality and latency report on held-out samples
+"""
+import os
+import json
+import random
+import shutil
+import hashlib
+import argparse
+from glob import glob
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset
+from transformers import (
+    GPT2Config,
+    GPT2LMHeadModel,
+    Trainer,
+    TrainingArguments,
+    PreTrainedTokenizerFast,
+    default_data_collator,
+)
+
+from sfm2.training.evaluation import evaluate_model
+from sfm2.training.pipeline import get_dataset
+
+TEACHER_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../models/sfm-2/")
+)
+TOKENIZER_PATH = os.path.join(TEACHER_DIR, "tokenizer.json")
+DATA_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../datasets/cleaned/")
+)
+STUDENT_OUT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../models/sfm-2-student/")
+)
+REPORT_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "sfm2_distill_report.json")
+)
+
+
+def split_corpus(data_dir, split_dir, eval_fraction=0.1, seed=0):
+    """Copy ``data_dir``'s .sona files into ``split_dir``/train and ``split_dir``/eval.
+
+    The split is deterministic for a given file set and seed. Returns (train_dir, eval_dir).
+    """
+    files = sorted(glob(os.path.join(data_dir, "*.sona")))
+    if len(files) < 2:
+        raise ValueError(f"Need at least two .sona files in {data_dir} to hold out an eval split; pass eval_dir")
+    n_eval = max(1, int(len(files) * eval_fraction))
+    held_out = set(random.Random(seed).sample(files, n_eval))
+    train_dir, eval_dir = os.path.join(split_dir, "train"), os.path.join(split_dir, "eval")
+    for directory in (train_dir, eval_dir):
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+    for path in files:
+        shutil.copy(path, eval_dir if path in held_out else train_dir)
+    return train_dir, eval_dir
+
+
+def _fingerprint(dataset):
+    digest = hashlib.sha1()
+    for i in range(len(dataset)):
+        digest.update(dataset[i].numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cache_teacher_logits(teacher, dataset, cache_dir, top_k=64, batch_size=4):
+    """Write the teacher's top-k logits for every block to memory-mapped files.
+
+    Returns (values, indices) memmaps of shape (blocks, block_size, top_k). An existing cache
+    is reused when it was built from the same blocks and ``top_k``.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    values_path = os.path.join(cache_dir, "values.npy")
+    indices_path = os.path.join(cache_dir, "indices.npy")
+    meta = {
+        "blocks": len(dataset),
+        "block_size": int(dataset[0].shape[0]),
+        "top_k": top_k,
+        "fingerprint": _fingerprint(dataset),
+    }
+
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            if json.load(f) == meta:
+                print(f"♻️ Reusing teacher logits cache in {cache_dir}")
+                return np.load(values_path, mmap_mode="r"), np.load(indices_path, mmap_mode="r")
+
+    shape = (meta["blocks"], meta["block_size"], top_k)
+    values = np.lib.format.open_memmap(values_path, mode="w+", dtype=np.float16, shape=shape)
+    indices = np.lib.format.open_memmap(indices_path, mode="w+", dtype=np.int32, shape=shape)
+
+    device = next(teacher.parameters()).device
+    teacher.eval()
+    with torch.no_grad():
+        for start in range(0, len(dataset), batch_size):
+            batch = torch.stack([dataset[i] for i in range(start, min(start + batch_size, len(dataset)))])
+            logits = teacher(input_ids=batch.to(device)).logits
+            top = logits.float().topk(top_k, dim=-1)
+            values[start:start + len(batch)] = top.values.cpu().numpy().astype(np.float16)
+            indices[start:start + len(batch)] = top.indices.cpu().numpy().astype(np.int32)
+    values.flush()
+    indices.flush()
+
+    # Written last so an interrupted run is never mistaken for a complete cache
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    print(f"✅ Cached teacher logits for {meta['blocks']} blocks in {cache_dir}")
+    return np.load(values_path, mmap_mode="r"), np.load(indices_path, mmap_mode="r")
+
+
+class DistillationDataset(Dataset):
+    """Training blocks paired with the teacher's cached top-k logits."""
+
+    def __init__(self, dataset, values, indices):
+        self.dataset = dataset
+        self.values = values
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, i):
+        input_ids = self.dataset[i]
+        return {
+            "input_ids": input_ids,
+            "labels": input_ids.clone(),
+            "teacher_values": torch.from_numpy(np.array(self.values[i], dtype=np.float32)),
+            "teacher_indices": torch.from_numpy(np.array(self.indices[i], dtype=np.int64)),
+        }
+
+
+class DistillationTrainer(Trainer):
+    """Trainer mixing soft-target loss against the cached teacher logits with the usual LM loss."""
+
+    def __init__(self, *args, temperature=2.0, alpha=0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature = temperature
+        self.alpha = alpha
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        teacher_values = inputs.pop("teacher_values")
+        teacher_indices = inputs.pop("teacher_indices")
+        outputs = model(**inputs)
+
+        t = self.temperature
+        # Soft targets restricted to the teacher's top-k support
+        student_logp = F.log_softmax(outputs.logits.float() / t, dim=-1).gather(-1, teacher_indices)
+        teacher_p = F.softmax(teacher_values / t, dim=-1)
+        soft_loss = -(teacher_p * student_logp).sum(-1).mean() * (t * t)
+
+        loss = self.alpha * soft_loss + (1.0 - self.alpha) * outputs.loss
+        return (loss, outputs) if return_outputs else loss
+
+
+def build_student(teacher, n_layer, n_embd, n_head):
+    """Smaller GPT-2 sharing the teacher's vocabulary and context length.
+
+    When ``n_embd`` matches the teacher, embeddings and evenly spaced teacher blocks are copied
+    in as initialisation.
+    """
+    config_dict = teacher.config.to_dict()
+    config_dict.update({"n_layer": n_layer, "n_embd": n_embd, "n_head": n_head})
+    student = GPT2LMHeadModel(GPT2Config(**config_dict))
+
+    if n_embd == teacher.config.n_embd:
+        student.transformer.wte.load_state_dict(teacher.transformer.wte.state_dict())
+        student.transformer.wpe.load_state_dict(teacher.transformer.wpe.state_dict())
+        student.transformer.ln_f.load_state_dict(teacher.transformer.ln_f.state_dict())
+        picks = np.linspace(0, teacher.config.n_layer - 1, n_layer).round().astype(int)
+        for student_block, teacher_idx in zip(student.transformer.h, picks):
+            student_block.load_state_dict(teacher.transformer.h[teacher_idx].state_dict())
+    return student
+
+
+def _warm_up(model, tokenizer, steps=3):
+    """Run a few short generations so one-off allocation and kernel setup is not timed."""
+    input_ids = tokenizer("fn main() {", return_tensors="pt")["input_ids"]
+    with torch.no_grad():
+        for _ in range(steps):
+            model.generate(input_ids, max_new_tokens=16, do_sample=False, pad_token_id=tokenizer.pad_token_id)
+
+
+def distill(teacher_dir, tokenizer_path, data_dir, student_out, report_path, n_layer=6, n_embd=384,
+            n_head=6, epochs=3, top_k=64, temperature=2.0, alpha=0.5, cache_dir=None, eval_samples=50,
+            eval_dir=None, eval_fraction=0.1):
+    """Run teacher caching, student training and the comparison report.
+
+    The report is scored on ``eval_dir``; without one, ``eval_fraction`` of ``data_dir`` is held
+    out of training and used instead.
+    """
+    os.makedirs(student_out, exist_ok=True)
+    cache_dir = cache_dir or os.path.join(student_out, "teacher_cache")
+    train_dir = data_dir
+    if eval_dir is None:
+        train_dir, eval_dir = split_corpus(data_dir, os.path.join(student_out, "splits"), eval_fraction)
+        print(f"✂️ Held out {len(glob(os.path.join(eval_dir, '*.sona')))} files from {data_dir} for evaluation")
+
+    tokenizer = PreTrainedTokenizerFast(tokenizer_file=tokenizer_path)
+    teacher = GPT2LMHeadModel.from_pretrained(teacher_dir)
+    if torch.cuda.is_available():
+        teacher.to("cuda")
+
+    dataset = get_dataset(tokenizer, train_dir)
+    if len(dataset) == 0:
+        # get_dataset drops any remainder shorter than one 1024-token block
+        raise ValueError(f"No training blocks in {train_dir}: the corpus is shorter than one 1024-token block")
+    values, indices = cache_teacher_logits(teacher, dataset, cache_dir, top_k=top_k)
+
+    student = build_student(teacher.cpu(), n_layer, n_embd, n_head)
+    training_args = TrainingArguments(
+        output_dir=student_out,
+        overwrite_output_dir=True,
+        num_train_epochs=epochs,
+        per_device_train_batch_size=2,
+        gradient_accumulation_steps=2,
+        save_steps=500,
+        save_total_limit=2,
+        logging_steps=50,
+        learning_rate=1e-4,
+        warmup_steps=200,
+        weight_decay=0.01,
+        fp16=torch.cuda.is_available(),
+        remove_unused_columns=False,
+        report_to=[],
+    )
+    trainer = DistillationTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=DistillationDataset(dataset, values, indices),
+        data_collator=default_data_collator,
+        temperature=temperature,
+        alpha=alpha,
+    )
+    trainer.train()
+    student.save_pretrained(student_out)
+    tokenizer.save_pretrained(student_out)
+    print(f"✅ SFM-2 student trained and saved to {student_out}")
+
+    # Side-by-side comparison on CPU, where the simple route is served
+    report = {}
+    for name, model in (("teacher", teacher.cpu()), ("student", student.cpu())):
+        model.eval()
+        _warm_up(model, tokenizer)
+        with torch.no_grad():
+            results = evaluate_model(model, tokenizer, eval_dir, max_samples=eval_samples)
+        results["parameters"] = sum(p.numel() for p in model.parameters())
+        report[name] = results
+    # Throughput, not per-sample latency: a student that stops early at EOS must not look faster
+    report["speedup"] = report["student"]["tokens_per_second"] / max(1e-9, report["teacher"]["tokens_per_second"])
+    report["student_config"] = {"n_layer": n_layer, "n_embd": n_embd, "n_head": n_head}
+    report["eval_dir"] = eval_dir
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"📊 Student: {report['student']['parameters'] / 1e6:.1f}M params, "
+        f"{report['speedup']:.2f}x faster, BLEU {report['student']['bleu_mean']:.3f} "
+        f"vs teacher {report['teacher']['bleu_mean']:.3f}. Report saved to {report_path}"
+    )
+
+
+def main(argv=None):
+    """Entry point for the ``sfm2-distill`` console script."""
+    parser = argparse.ArgumentParser(description="Distil SFM-2 into a smaller student model")
+    parser.add_argument("--teacher-dir", default=TEACHER_DIR, help="Directory containing the trained SFM-2 model")
+    parser.add_argument("--tokenizer", default=TOKENIZER_PATH, help="Path to the tokenizer file")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory containing training data (.sona files)")
+    parser.add_argument("--student-out", default=STUDENT_OUT, help="Directory to save the student model")
+    parser.add_argument("--report", default=REPORT_PATH, help="File to write the teacher/student comparison")
+    parser.add_argument("--n-layer", type=int, default=6, help="Student transformer layers")
+    parser.add_argument("--n-embd", type=int, default=384, help="Student hidden size")
+    parser.add_argument("--n-head", type=int, default=6, help="Student attention heads")
+    parser.add_argument("--epochs", type=int, default=3, help="Training epochs")
+    parser.add_argument("--top-k", type=int, default=64, help="Teacher logits cached per position")
+    parser.add_argument("--temperature", type=float, default=2.0, help="Softmax temperature for soft targets")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the soft-target loss vs. LM loss")
+    parser.add_argument("--cache-dir", default=None, help="Teacher logits cache (default: <student-out>/teacher_cache)")
+    parser.add_argument("--eval-samples", type=int, default=50, help="Samples used for the comparison report")
+    parser.add_argument("--eval-dir", default=None,
+                        help="Held-out .sona files for the comparison report (default: split off --eval-fraction)")
+    parser.add_argument("--eval-fraction", type=float, default=0.1,
+                        help="Share of --data-dir files held out of training when --eval-dir is not given")
+    args = parser.parse_args(argv)
+
+    if args.n_embd % args.n_head:
+        parser.error("--n-embd must be divisible by --n-head")
+    if not 0.0 < args.eval_fraction < 1.0:
+        parser.error("--eval-fraction must be between 0 and 1")
+
+    distill(
+        args.teacher_dir, args.tokenizer, args.data_dir, args.student_out, args.report,
+        n_layer=args.n_layer, n_embd=args.n_embd, n_head=args.n_head, epochs=args.epochs,
+        top_k=args.top_k, temperature=args.temperature, alpha=args.alpha,
+        cache_dir=args.cache_dir, eval_samples=args.eval_samples,
+        eval_dir=args.eval_dir, eval_fraction=args.eval_fraction,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ Evaluates SFM-2 model on BLEU, syntax accuracy, and function completion rate.
 """
 import os
 import json
+import time
 import argparse
 from glob import glob
 from transformers import GPT2LMHeadModel, PreTrainedTokenizerFast
@@ -18,41 +19,64 @@ DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../datasets/
 RESULTS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "sfm2_eval_results.json"))
 
 
-def evaluate(model_dir, tokenizer_path, data_dir, results_path):
-    """Run the evaluation loop."""
-    model = GPT2LMHeadModel.from_pretrained(model_dir)
-    tokenizer = PreTrainedTokenizerFast(tokenizer_file=tokenizer_path)
+def score_sample(ref, gen):
+    """Score one generation against its reference: (bleu, syntax_ok, function_complete)."""
+    bleu = sentence_bleu([ref.split()], gen.split(), smoothing_function=SmoothingFunction().method1)
+    syntax_ok = gen.count("{") == gen.count("}") and gen.count("(") == gen.count(")")
+    func_complete = "fn" in gen and gen.strip().endswith("}")
+    return bleu, syntax_ok, func_complete
+
+
+def evaluate_model(model, tokenizer, data_dir, max_samples=None):
+    """Score an in-memory model on ``data_dir``; also reports greedy generation latency."""
     model.eval()
 
     bleu_scores = []
     syntax_correct = 0
     func_complete = 0
     n = 0
+    gen_seconds = 0.0
+    gen_tokens = 0
 
-    for file in glob(os.path.join(data_dir, "*.sona")):
+    for file in sorted(glob(os.path.join(data_dir, "*.sona"))):
+        if max_samples is not None and n >= max_samples:
+            break
         with open(file, "r", encoding="utf-8") as f:
             ref = f.read().strip()
         if len(ref) < 20:
             continue
         inputs = tokenizer(ref, return_tensors="pt")
+        start = time.perf_counter()
         output_ids = model.generate(
             inputs["input_ids"], max_length=inputs["input_ids"].shape[1] + 64, do_sample=False
         )
+        gen_seconds += time.perf_counter() - start
+        gen_tokens += output_ids.shape[1] - inputs["input_ids"].shape[1]
         gen = tokenizer.decode(output_ids[0], skip_special_tokens=True)
-        bleu = sentence_bleu([ref.split()], gen.split(), smoothing_function=SmoothingFunction().method1)
+        bleu, syntax_ok, func_ok = score_sample(ref, gen)
         bleu_scores.append(bleu)
-        if gen.count("{") == gen.count("}") and gen.count("(") == gen.count(")"):
+        if syntax_ok:
             syntax_correct += 1
-        if "fn" in gen and gen.strip().endswith("}"):
+        if func_ok:
             func_complete += 1
         n += 1
 
-    results = {
+    return {
         "bleu_mean": sum(bleu_scores) / max(1, len(bleu_scores)),
         "syntax_accuracy": syntax_correct / max(1, n),
         "function_completion_rate": func_complete / max(1, n),
         "samples": n,
+        "latency_mean_s": gen_seconds / max(1, n),
+        "tokens_per_second": gen_tokens / gen_seconds if gen_seconds else 0.0,
     }
+
+
+def evaluate(model_dir, tokenizer_path, data_dir, results_path):
+    """Run the evaluation loop."""
+    model = GPT2LMHeadModel.from_pretrained(model_dir)
+    tokenizer = PreTrainedTokenizerFast(tokenizer_file=tokenizer_path)
+
+    results = evaluate_model(model, tokenizer, data_dir)
     with open(results_path, "w", encoding="utf-8") as f:
         json.dump(results, f, indent=2)
 
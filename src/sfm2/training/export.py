@@ -0,0 +1,229 @@
+"""
+Phase 4c: SFM-2 Export for CPU Inference
+Converts a trained models/sfm-2/ checkpoint into a static graph for the ``onnx`` or ``torchscript``
+serving backends (see sfm2.core.backends).
+- Graph inputs: input_ids, position_ids and a flat KV cache (past_{i}_key / past_{i}_value)
+- Verifies numerical parity with eager GPT2LMHeadModel (prefill, cached decode, greedy tokens)
+- Benchmarks greedy decoding latency of the exported graph against eager mode
+- Writes the graph, config, tokenizer and export_report.json to the output directory
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import torch
+from transformers import GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from sfm2.core.backends import EXPORT_CONFIG, GRAPH_FILES, greedy_generate, load_backend
+
+MODEL_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../models/sfm-2/")
+)
+TOKENIZER_PATH = os.path.join(MODEL_DIR, "tokenizer.json")
+
+
+def _legacy_cache(past):
+    """Per-layer (key, value) tuples from any transformers cache representation."""
+    if hasattr(past, "to_legacy_cache"):
+        return past.to_legacy_cache()
+    if hasattr(past, "layers"):
+        return tuple((layer.keys, layer.values) for layer in past.layers)
+    return past
+
+
+class KVCacheWrapper(torch.nn.Module):
+    """Flat-tensor signature around GPT2LMHeadModel suitable for tracing.
+
+    ``forward(input_ids, position_ids, past_0_key, past_0_value, ...)`` returns
+    ``(logits, present_0_key, present_0_value, ...)``. Position ids are explicit so the
+    past length is not baked into the traced graph as a constant.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.n_layer = model.config.n_layer
+
+    def forward(self, input_ids, position_ids, *flat_past):
+        past = tuple((flat_past[2 * i], flat_past[2 * i + 1]) for i in range(self.n_layer))
+        try:
+            from transformers import DynamicCache
+            past = DynamicCache.from_legacy_cache(past)
+        except (ImportError, AttributeError):
+            pass
+        out = self.model(
+            input_ids=input_ids, position_ids=position_ids, past_key_values=past, use_cache=True, return_dict=True
+        )
+        present = _legacy_cache(out.past_key_values)
+        return (out.logits,) + tuple(t for layer in present for t in layer)
+
+
+def load_model(model_dir):
+    """Load the checkpoint with eager attention and KV caching enabled, as exported graphs expect."""
+    model = GPT2LMHeadModel.from_pretrained(model_dir, attn_implementation="eager")
+    model.config.use_cache = True
+    return model.eval()
+
+
+def _example_inputs(config, seq_len=8, past_len=4):
+    head_dim = config.n_embd // config.n_head
+    input_ids = torch.randint(0, config.vocab_size, (1, seq_len))
+    position_ids = torch.arange(past_len, past_len + seq_len).unsqueeze(0)
+    past = [torch.randn(1, config.n_head, past_len, head_dim) for _ in range(2 * config.n_layer)]
+    return input_ids, position_ids, past
+
+
+def _io_names(n_layer):
+    past = [f"past_{i}_{kv}" for i in range(n_layer) for kv in ("key", "value")]
+    present = [f"present_{i}_{kv}" for i in range(n_layer) for kv in ("key", "value")]
+    return ["input_ids", "position_ids"] + past, ["logits"] + present
+
+
+def export_onnx(model, out_dir, opset=17):
+    wrapper = KVCacheWrapper(model).eval()
+    input_ids, position_ids, past = _example_inputs(model.config)
+    input_names, output_names = _io_names(model.config.n_layer)
+    dynamic_axes = {name: {0: "batch", 1: "seq"} for name in ("input_ids", "position_ids", "logits")}
+    dynamic_axes.update({name: {0: "batch", 2: "past_seq"} for name in input_names[2:]})
+    dynamic_axes.update({name: {0: "batch", 2: "total_seq"} for name in output_names[1:]})
+    path = os.path.join(out_dir, GRAPH_FILES["onnx"])
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            (input_ids, position_ids, *past),
+            path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    return path
+
+
+def export_torchscript(model, out_dir):
+    wrapper = KVCacheWrapper(model).eval()
+    input_ids, position_ids, past = _example_inputs(model.config)
+    with torch.no_grad():
+        traced = torch.jit.trace(wrapper, (input_ids, position_ids, *past), check_trace=False)
+        traced = torch.jit.freeze(traced)
+    path = os.path.join(out_dir, GRAPH_FILES["torchscript"])
+    traced.save(path)
+    return path
+
+
+def verify_parity(model, backend, prompt_len=16, new_tokens=16, atol=1e-3, seed=0):
+    """Compare exported and eager logits for prefill and cached decode, and greedy token output.
+
+    Uses a prompt length different from the export example so shape specialisation is caught.
+    """
+    torch.manual_seed(seed)
+    input_ids = torch.randint(0, model.config.vocab_size, (1, prompt_len))
+    with torch.no_grad():
+        eager = model(input_ids=input_ids, use_cache=True)
+        exported = backend(input_ids=input_ids)
+        prefill_diff = (eager.logits - exported.logits).abs().max().item()
+
+        next_ids = eager.logits[:, -1:].argmax(dim=-1)
+        eager_step = model(input_ids=next_ids, past_key_values=eager.past_key_values, use_cache=True)
+        exported_step = backend(input_ids=next_ids, past_key_values=exported.past_key_values)
+        decode_diff = (eager_step.logits - exported_step.logits).abs().max().item()
+
+    eager_tokens = greedy_generate(model, input_ids, max_new_tokens=new_tokens)
+    exported_tokens = greedy_generate(backend, input_ids, max_new_tokens=new_tokens)
+    tokens_match = torch.equal(eager_tokens, exported_tokens)
+    return {
+        "prefill_max_abs_diff": prefill_diff,
+        "decode_max_abs_diff": decode_diff,
+        "greedy_tokens_match": tokens_match,
+        "atol": atol,
+        "passed": prefill_diff <= atol and decode_diff <= atol and tokens_match,
+    }
+
+
+def benchmark(model, backend, prompt_len=32, new_tokens=32, repeat=5):
+    """Median greedy decoding latency for eager vs. exported, in ms per generated token."""
+    input_ids = torch.randint(0, model.config.vocab_size, (1, prompt_len))
+    results = {}
+    for name, runner in (("eager", model), ("exported", backend)):
+        greedy_generate(runner, input_ids, max_new_tokens=4)  # warm-up
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            greedy_generate(runner, input_ids, max_new_tokens=new_tokens)
+            samples.append((time.perf_counter() - start) / new_tokens * 1e3)
+        results[f"{name}_ms_per_token"] = statistics.median(samples)
+    results["speedup"] = results["eager_ms_per_token"] / results["exported_ms_per_token"]
+    results.update({"prompt_len": prompt_len, "new_tokens": new_tokens, "threads": torch.get_num_threads()})
+    return results
+
+
+def export(model_dir, tokenizer_path, out_dir, fmt, opset=17, atol=1e-3):
+    """Export, verify and benchmark. Returns the report dict."""
+    os.makedirs(out_dir, exist_ok=True)
+    model = load_model(model_dir)
+
+    if fmt == "onnx":
+        path = export_onnx(model, out_dir, opset=opset)
+    else:
+        path = export_torchscript(model, out_dir)
+
+    config = model.config
+    config.save_pretrained(out_dir)
+    if os.path.exists(tokenizer_path):
+        PreTrainedTokenizerFast(tokenizer_file=tokenizer_path).save_pretrained(out_dir)
+    with open(os.path.join(out_dir, EXPORT_CONFIG), "w", encoding="utf-8") as f:
+        json.dump(
+            {"format": fmt, "n_layer": config.n_layer, "n_head": config.n_head,
+             "head_dim": config.n_embd // config.n_head, "opset": opset if fmt == "onnx" else None},
+            f,
+            indent=2,
+        )
+    print(f"✅ Exported {fmt} graph to {path}")
+
+    backend = load_backend(fmt, out_dir)
+    report = {
+        "format": fmt,
+        "source": model_dir,
+        "parity": verify_parity(model, backend, atol=atol),
+        "benchmark": benchmark(model, backend),
+    }
+    with open(os.path.join(out_dir, "export_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    """Entry point for the ``sfm2-export`` console script."""
+    parser = argparse.ArgumentParser(description="Export a trained SFM-2 model for optimized CPU inference")
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory containing the trained model")
+    parser.add_argument("--tokenizer", default=TOKENIZER_PATH, help="Path to the tokenizer file")
+    parser.add_argument("--format", choices=sorted(GRAPH_FILES), default="onnx", help="Export format")
+    parser.add_argument("--output-dir", default=None, help="Export directory (default: <model-dir>/<format>)")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset version")
+    parser.add_argument("--atol", type=float, default=1e-3, help="Max absolute logit difference allowed vs. eager")
+    args = parser.parse_args(argv)
+
+    out_dir = args.output_dir or os.path.join(args.model_dir, args.format)
+    report = export(args.model_dir, args.tokenizer, out_dir, args.format, opset=args.opset, atol=args.atol)
+
+    parity, bench = report["parity"], report["benchmark"]
+    print(
+        f"🔍 Parity: prefill {parity['prefill_max_abs_diff']:.2e}, decode {parity['decode_max_abs_diff']:.2e}, "
+        f"greedy tokens {'match' if parity['greedy_tokens_match'] else 'DIFFER'}"
+    )
+    print(
+        f"⏱️ Eager {bench['eager_ms_per_token']:.2f} ms/token vs {args.format} "
+        f"{bench['exported_ms_per_token']:.2f} ms/token ({bench['speedup']:.2f}x)"
+    )
+    if not parity["passed"]:
+        print(f"❌ Exported graph does not match eager outputs within atol={args.atol}; do not serve it")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Server-side Request Metrics
+Latency histograms and routing/outcome breakdowns measured inside the API process.
+- Cumulative per-model latency histograms with fixed millisecond buckets, for served ("ok") requests only
+- Rolling timeline of fixed windows (request rate, latency percentiles, per-model counts)
+- JSON snapshots served by the API and charted by the demo dashboard
+"""
+import time
+import math
+import threading
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Sequence
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, math.inf)
+
+
+def percentile_from_buckets(buckets: Sequence[Sequence[float]], q: float) -> Optional[float]:
+    """Estimate the ``q`` quantile (0-1) from ``[[upper_bound_ms, count], ...]`` by linear interpolation."""
+    total = sum(count for _, count in buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen, lower = 0, 0.0
+    for upper, count in buckets:
+        if count and seen + count >= rank:
+            if math.isinf(upper):
+                return lower
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+        lower = upper
+    return lower
+
+
+class LatencyHistogram:
+    def __init__(self, bounds_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self.counts = [0] * len(self.bounds_ms)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1e3
+        self.counts[bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def buckets(self) -> List[List[float]]:
+        return [[bound, count] for bound, count in zip(self.bounds_ms, self.counts)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = self.buckets()
+        return {
+            # JSON has no infinity; the overflow bucket is reported as "inf"
+            "buckets": [["inf" if math.isinf(b) else b, c] for b, c in buckets],
+            "count": self.count,
+            "mean_ms": self.sum_ms / self.count if self.count else None,
+            "p50_ms": percentile_from_buckets(buckets, 0.50),
+            "p95_ms": percentile_from_buckets(buckets, 0.95),
+            "p99_ms": percentile_from_buckets(buckets, 0.99),
+        }
+
+
+class ServerMetrics:
+    def __init__(self, window_s: float = 5.0, history: int = 720, clock=time.time):
+        self.window_s = window_s
+        self.clock = clock
+        self.started = clock()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.outcomes = Counter()  # "model.outcome" -> count
+        self.timeline = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._new_window(self.started)
+
+    def _new_window(self, start: float):
+        self._window_start = start
+        self._window_hist = LatencyHistogram()
+        self._window_requests = 0
+        self._window_models = Counter()
+        self._window_outcomes = Counter()
+
+    def _roll(self, now: float):
+        while now - self._window_start >= self.window_s:
+            hist = self._window_hist.snapshot()
+            self.timeline.append({
+                "t": self._window_start + self.window_s,
+                "requests": self._window_requests,
+                "rps": self._window_requests / self.window_s,
+                "served": hist["count"],
+                "p50_ms": hist["p50_ms"],
+                "p95_ms": hist["p95_ms"],
+                "p99_ms": hist["p99_ms"],
+                "by_model": dict(self._window_models),
+                "by_outcome": dict(self._window_outcomes),
+            })
+            self._new_window(self._window_start + self.window_s)
+            if now - self._window_start >= self.window_s * self.timeline.maxlen:
+                self._new_window(now)  # long idle gap: skip empty windows
+
+    def observe(self, model: str, outcome: str, seconds: float):
+        """Record one request served by ``model`` ("none" if not routed) with ``outcome``.
+
+        Only ``ok`` requests enter the latency histograms; near-instant rejections would otherwise
+        pull the percentiles down exactly when the server is overloaded.
+        """
+        with self._lock:
+            self._roll(self.clock())
+            if outcome == "ok":
+                self.histograms.setdefault(model, LatencyHistogram()).observe(seconds)
+                self._window_hist.observe(seconds)
+            self.outcomes[f"{model}.{outcome}"] += 1
+            self._window_requests += 1
+            self._window_models[model] += 1
+            self._window_outcomes[outcome] += 1
+
+    def snapshot(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """Full snapshot; ``since`` limits the timeline to windows ending after that timestamp."""
+        with self._lock:
+            now = self.clock()
+            self._roll(now)
+            return {
+                "now": now,
+                "uptime_s": now - self.started,
+                "window_s": self.window_s,
+                "latency": {model: hist.snapshot() for model, hist in self.histograms.items()},
+                "outcomes": dict(self.outcomes),
+                "timeline": [w for w in self.timeline if since is None or w["t"] > since],
+            }
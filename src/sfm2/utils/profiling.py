@@ -0,0 +1,174 @@
+"""
+Runtime Profiling for the SFM-2 API
+Low-overhead diagnostics that stay off until asked for.
+- SamplingProfiler: background thread sampling all Python stacks, emits folded stacks
+  (flamegraph.pl / speedscope / inferno compatible)
+- RequestTrace: opt-in per-request span timings, propagated through a context variable so
+  untraced requests only pay for one ContextVar lookup per span
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter, deque
+from contextlib import nullcontext
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger("SonaProfiling")
+
+TRACE_HEADER = "x-sfm2-trace"
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("sfm2_request_trace", default=None)
+_NULL_SPAN = nullcontext()
+RECENT_TRACES: Deque[Dict[str, Any]] = deque(maxlen=100)
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.samples.clear()
+        self.sample_count = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sfm2-sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def collapsed(self) -> str:
+        """Folded stack output: one ``frame;frame;frame count`` line per unique stack."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+class RequestTrace:
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.started = time.perf_counter()
+        self.total = None
+        self.spans: Dict[str, list] = {}  # name -> [seconds, count]
+
+    def record(self, name: str, seconds: float):
+        span = self.spans.setdefault(name, [0.0, 0])
+        span[0] += seconds
+        span[1] += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "total_ms": round((self.total or 0.0) * 1e3, 3),
+            "spans": {name: {"ms": round(s * 1e3, 3), "count": n} for name, (s, n) in self.spans.items()},
+        }
+
+    def server_timing(self) -> str:
+        """Render spans as a ``Server-Timing`` header value."""
+        parts = [f"{name};dur={s * 1e3:.3f}" for name, (s, _) in self.spans.items()]
+        parts.append(f"total;dur={(self.total or 0.0) * 1e3:.3f}")
+        return ", ".join(parts)
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: RequestTrace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def trace_span(name: str):
+    """Time a block against the active request trace; a shared no-op when tracing is off."""
+    trace = _current_trace.get()
+    return _NULL_SPAN if trace is None else _Span(trace, name)
+
+
+def record_span(name: str, seconds: float):
+    """Add an externally measured duration to the active request trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(name, seconds)
+
+
+class TraceMiddleware:
+    """ASGI middleware enabling a RequestTrace for requests sending ``X-SFM2-Trace: 1``.
+
+    Traced responses carry a ``Server-Timing`` header and are kept in ``RECENT_TRACES``.
+    Other requests are passed straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_trace(scope):
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope.get("path", ""))
+        token = _current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                trace.finish()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            if trace.total is None:
+                trace.finish()
+            RECENT_TRACES.append(trace.to_dict())
+            logger.info(f"Request trace: {trace.to_dict()}")
+
+    @staticmethod
+    def _wants_trace(scope) -> bool:
+        for key, value in scope.get("headers", ()):
+            if key == TRACE_HEADER.encode():
+                return value.lower() in (b"1", b"true", b"yes")
+        return False
@@ -0,0 +1,78 @@
+"""
+Startup Timing Report
+Records named startup phases (imports, model loads) relative to process start so cold-start
+regressions can be tracked. Phases may run in a background thread after the API is serving.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("SonaStartup")
+
+
+class StartupReport:
+    def __init__(self, origin: Optional[float] = None, target_s: float = 2.0):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.target_s = target_s
+        self.phases: List[Dict[str, Any]] = []
+        self.serving_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _ms(self, t: float) -> float:
+        return round((t - self.origin) * 1e3, 3)
+
+    def record(self, name: str, start: float, end: float, status: str = "ok", error: Optional[str] = None):
+        entry = {"name": name, "start_ms": self._ms(start), "duration_ms": round((end - start) * 1e3, 3), "status": status}
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self.phases.append(entry)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a startup phase; failures are recorded and re-raised."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, start, time.perf_counter(), status="failed", error=str(e))
+            raise
+        self.record(name, start, time.perf_counter())
+
+    def skip(self, name: str, reason: str):
+        now = time.perf_counter()
+        self.record(name, now, now, status="skipped", error=reason)
+
+    def mark_serving(self):
+        """The app is accepting requests (e.g. /health)."""
+        self.serving_at = time.perf_counter()
+        elapsed = self.serving_at - self.origin
+        if elapsed > self.target_s:
+            logger.warning(f"Time to serving {elapsed:.2f}s exceeds target {self.target_s:.2f}s")
+
+    def mark_ready(self):
+        """Background imports and model loads have finished."""
+        self.ready_at = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "serving": self.serving_at is not None,
+            "ready": self.ready_at is not None,
+            "time_to_serving_ms": self._ms(self.serving_at) if self.serving_at else None,
+            "time_to_ready_ms": self._ms(self.ready_at) if self.ready_at else None,
+            "target_ms": self.target_s * 1e3,
+            "phases": phases,
+        }
+
+    def log(self):
+        report = self.to_dict()
+        lines = [f"  {p['name']:<20} {p['duration_ms']:>10.1f} ms  {p['status']}" for p in report["phases"]]
+        logger.info(
+            f"Startup report: serving after {report['time_to_serving_ms']} ms, "
+            f"ready after {report['time_to_ready_ms']} ms\n" + "\n".join(lines)
+        )
@@ -0,0 +1,32 @@
+"""
+Shared test fixtures: tiny randomly initialised GPT-2 models that run in milliseconds on CPU.
+Mirrors the target/draft shapes used by benchmarks/, without depending on that package.
+"""
+import pytest
+
+VOCAB = 128
+SEED = 1234
+TARGET_CONFIG = {"n_positions": 512, "n_embd": 64, "n_layer": 2, "n_head": 4}
+DRAFT_CONFIG = {"n_positions": 512, "n_embd": 32, "n_layer": 1, "n_head": 2}
+
+
+def tiny_gpt2(vocab_size=VOCAB, seed=SEED, **config):
+    """Randomly initialised GPT-2 in eval mode with special token ids 0-3 like the Sona tokenizer."""
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(seed)
+    config = GPT2Config(vocab_size=vocab_size, bos_token_id=1, eos_token_id=2, pad_token_id=0, **config)
+    return GPT2LMHeadModel(config).eval()
+
+
+@pytest.fixture(scope="session")
+def target():
+    """Stand-in for sfm2."""
+    return tiny_gpt2(**TARGET_CONFIG)
+
+
+@pytest.fixture(scope="session")
+def draft():
+    """Stand-in for gpt2_lora, sharing the target's vocabulary."""
+    return tiny_gpt2(seed=SEED + 1, **DRAFT_CONFIG)
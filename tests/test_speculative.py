@@ -0,0 +1,88 @@
+"""
+Speculative decoding must reproduce target-only greedy decoding token for token.
+Runs offline on CPU with the tiny GPT-2 ``target`` / ``draft`` fixtures from conftest.py:
+    pytest tests/test_speculative.py
+"""
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from sfm2.core.speculative import SpeculativeDecoder  # noqa: E402
+
+NEW_TOKENS = 24
+
+
+@pytest.fixture(scope="module")
+def prompt(target):
+    torch.manual_seed(0)
+    return torch.randint(4, target.config.vocab_size, (1, 12))
+
+
+class ShiftedDraft(torch.nn.Module):
+    """Draft whose greedy token is always the target's token + 1, so every draft is rejected."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.config = model.config
+
+    def forward(self, **kwargs):
+        out = self.model(**kwargs)
+        return SimpleNamespace(logits=out.logits.roll(1, dims=-1), past_key_values=out.past_key_values)
+
+
+def reference(target, prompt, max_new_tokens=NEW_TOKENS, eos_token_id=None):
+    eos_token_id = target.config.eos_token_id if eos_token_id is None else eos_token_id
+    with torch.no_grad():
+        return target.generate(
+            prompt, max_new_tokens=max_new_tokens, do_sample=False, eos_token_id=eos_token_id, pad_token_id=0
+        )
+
+
+def speculative(target, draft, prompt, max_new_tokens=NEW_TOKENS, eos_token_id=None, **kwargs):
+    eos_token_id = target.config.eos_token_id if eos_token_id is None else eos_token_id
+    decoder = SpeculativeDecoder(target=target, draft=draft, **kwargs)
+    return decoder.generate(prompt, max_new_tokens=max_new_tokens, eos_token_id=eos_token_id)
+
+
+@pytest.mark.parametrize("k", [1, 2, 4, 8])
+@pytest.mark.parametrize("adaptive", [True, False])
+def test_matches_greedy(target, draft, prompt, k, adaptive):
+    ids, stats = speculative(target, draft, prompt, k=k, adaptive=adaptive, max_k=max(k, 8))
+    assert torch.equal(ids, reference(target, prompt))
+    assert stats["new_tokens"] == ids.shape[1] - prompt.shape[1]
+
+
+def test_all_drafts_accepted(target, prompt):
+    ids, stats = speculative(target, target, prompt, k=4)
+    assert torch.equal(ids, reference(target, prompt))
+    assert stats["acceptance_rate"] == 1.0
+    assert stats["target_forward_passes"] < NEW_TOKENS
+
+
+def test_all_drafts_rejected(target, prompt):
+    ids, stats = speculative(target, ShiftedDraft(target), prompt, k=4)
+    assert torch.equal(ids, reference(target, prompt))
+    assert stats["accepted"] == 0
+    assert stats["final_k"] == 1
+
+
+def test_eos_truncation(target, draft, prompt):
+    # Use a token the target actually emits mid-sequence as EOS
+    generated = reference(target, prompt)[0, prompt.shape[1]:].tolist()
+    eos = generated[len(generated) // 2]
+    expected = reference(target, prompt, eos_token_id=eos)
+    assert expected[0, -1].item() == eos
+
+    for k in (1, 4):
+        ids, _ = speculative(target, draft, prompt, k=k, eos_token_id=eos)
+        assert torch.equal(ids, expected)
+
+
+def test_clamped_to_context(target, draft, prompt):
+    ids, stats = speculative(target, draft, prompt, max_new_tokens=10**9, eos_token_id=-1)
+    assert ids.shape[1] == target.config.n_positions
+    assert stats["new_tokens"] == target.config.n_positions - prompt.shape[1]